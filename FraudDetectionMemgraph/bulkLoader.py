@@ -0,0 +1,217 @@
+import csv
+import codecs
+import time
+import logging
+from queryMetrics import name_query
+
+logger = logging.getLogger(__name__)
+
+# Number of CSV rows sent to Memgraph in a single UNWIND batch
+DEFAULT_BATCH_SIZE = 5000
+
+# Cypher templates, each one is executed once per batch with $rows bound to a list of maps
+INVOICE_QUERY = name_query('invoices', """
+UNWIND $rows AS row
+MERGE (i:Invoice {invoiceID: row.invoice_id})
+ON CREATE SET
+    i.invoiceDate = row.invoice_date,
+    i.totalAmount = row.total_amount,
+    i.supplierIBAN = row.supplier_iban,
+    i.status = row.status,
+    i.dueDate = row.due_date,
+    i.supplierTAXID = row.supplier_tax_id,
+    i.fraud = row.fraud
+""")
+
+USER_QUERY = name_query('users', """
+UNWIND $rows AS row
+MERGE (u:User {userID: row.user_id})
+ON CREATE SET
+    u.id = id(u),
+    u.VATNumber = row.vat_number,
+    u.userName = row.user_name,
+    u.email = row.email,
+    u.phoneNumber = row.phone_number,
+    u.registrationDate = row.registration_date,
+    u.fraud = row.fraud
+""")
+
+UPLOADED_BY_QUERY = name_query('uploaded_by', """
+UNWIND $rows AS row
+MATCH (i:Invoice {invoiceID: row.invoice_id})
+MATCH (u:User {userID: row.user_id})
+MERGE (i)-[:UPLOADED_BY]->(u)
+""")
+
+NEEDS_PAYMENT_FROM_QUERY = name_query('needs_payment_from', """
+UNWIND $rows AS row
+MATCH (i:Invoice {invoiceID: row.invoice_id})
+MATCH (user_to_pay:User {VATNumber: row.supplier_tax_id})
+MERGE (i)-[:NEEDS_PAYMENT_FROM]->(user_to_pay)
+""")
+
+
+# Convert a CSV value to int, keeping a default for missing or empty cells.
+# int() first, so that IDs above 2^53 keep their exact value; "12.0" still parses.
+def to_int(value, default=None):
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return int(float(value))
+
+
+# Convert a CSV value to float, keeping None for missing or empty cells
+def to_float(value):
+    if value is None or value == '':
+        return None
+    return float(value)
+
+
+# Split any iterable into lists of at most batch_size items
+def batched(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Keeps row counts and elapsed time for each load stage
+class StageStats:
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, rows, seconds):
+        stats = self.stages.setdefault(stage, {'rows': 0, 'batches': 0, 'seconds': 0.0})
+        stats['rows'] += rows
+        stats['batches'] += 1
+        stats['seconds'] += seconds
+
+    def as_dict(self):
+        result = {}
+        for stage, stats in self.stages.items():
+            rows_per_sec = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+            result[stage] = dict(stats, rows_per_sec=round(rows_per_sec, 1))
+        return result
+
+    def log(self):
+        for stage, stats in self.as_dict().items():
+            logger.info(
+                f"{stage}: {stats['rows']} rows in {stats['batches']} batches, "
+                f"{stats['seconds']:.2f}s ({stats['rows_per_sec']} rows/sec)"
+            )
+
+
+# Send one batch and record how long the round trip took
+def execute_batch(memgraph, stats, stage, query, rows):
+    start = time.perf_counter()
+    memgraph.execute(query, {'rows': rows})
+    stats.add(stage, len(rows), time.perf_counter() - start)
+
+
+# Load invoice rows (dicts keyed by the CSV header) into Memgraph, chunk by
+# chunk while reading: invoices and users (deduplicated client-side), then the
+# chunk's UPLOADED_BY and NEEDS_PAYMENT_FROM edges. MATCH finds no supplier that
+# is not loaded yet, so once every user is in, a second read of the rows sends
+# again only the edges whose supplier first appeared in a later chunk. read_rows
+# is called once per pass and returns a fresh iterator of rows. Memory is
+# bounded by batch_size plus one entry per user, not by the number of rows.
+# invoice_ids, if given (e.g. an array('q')), gets the ID of every loaded invoice;
+# progress(invoices), if given, is called after each chunk has been committed.
+def load_invoice_rows(memgraph, read_rows, batch_size=DEFAULT_BATCH_SIZE, stats=None, invoice_ids=None, progress=None):
+    stats = stats or StageStats()
+    seen_users = set()
+    user_chunks = {}  # VAT number -> index of the chunk that loaded the user
+
+    for chunk_index, chunk in enumerate(batched(read_rows(), batch_size)):
+        invoices = []
+        users = []
+        uploaded_by = []
+        needs_payment_from = []
+
+        for row in chunk:
+            invoice_id = to_int(row['invoice_id'])
+            user_id = to_int(row['user_id'])
+            fraud = to_int(row.get('fraud'), -1)
+            supplier_tax_id = row.get('supplier_tax_id') or None
+
+            invoices.append({
+                'invoice_id': invoice_id,
+                'invoice_date': row['invoice_date'],
+                'total_amount': to_float(row['total_amount']),
+                'supplier_iban': row['supplier_iban'],
+                'status': row['status'],
+                'due_date': row['due_date'],
+                'supplier_tax_id': supplier_tax_id,
+                'fraud': fraud,
+            })
+
+            # Same semantics as MERGE ... ON CREATE: the first row of a user wins
+            if user_id not in seen_users:
+                seen_users.add(user_id)
+                user_chunks.setdefault(row['vat_number'], chunk_index)
+                users.append({
+                    'user_id': user_id,
+                    'vat_number': row['vat_number'],
+                    'user_name': row['user_name'],
+                    'email': row['email'],
+                    'phone_number': row['phone_number'],
+                    'registration_date': row['registration_date'],
+                    'fraud': fraud,
+                })
+
+            uploaded_by.append({'invoice_id': invoice_id, 'user_id': user_id})
+            if supplier_tax_id is not None:
+                needs_payment_from.append({'invoice_id': invoice_id, 'supplier_tax_id': supplier_tax_id})
+
+        execute_batch(memgraph, stats, 'invoices', INVOICE_QUERY, invoices)
+        if invoice_ids is not None:
+            invoice_ids.extend(invoice['invoice_id'] for invoice in invoices)
+        if users:
+            execute_batch(memgraph, stats, 'users', USER_QUERY, users)
+        load_edges(memgraph, stats, uploaded_by, needs_payment_from, batch_size)
+        if progress:
+            progress(len(invoices))
+
+    # Second pass: only edges to suppliers loaded after the invoice's own chunk
+    late_payments = (
+        {'invoice_id': to_int(row['invoice_id']), 'supplier_tax_id': row['supplier_tax_id']}
+        for chunk_index, chunk in enumerate(batched(read_rows(), batch_size))
+        for row in chunk
+        if user_chunks.get(row.get('supplier_tax_id') or None, -1) > chunk_index
+    )
+    load_edges(memgraph, stats, [], late_payments, batch_size)
+    return stats
+
+
+def load_edges(memgraph, stats, uploaded_by, needs_payment_from, batch_size):
+    for batch in batched(uploaded_by, batch_size):
+        execute_batch(memgraph, stats, 'uploaded_by', UPLOADED_BY_QUERY, batch)
+
+    for batch in batched(needs_payment_from, batch_size):
+        execute_batch(memgraph, stats, 'needs_payment_from', NEEDS_PAYMENT_FROM_QUERY, batch)
+
+
+# Load a seekable binary CSV stream (e.g. a spooled upload) without writing it
+# to disk; lines are decoded incrementally and only one chunk is held in memory
+def load_invoice_stream(memgraph, stream, batch_size=DEFAULT_BATCH_SIZE, stats=None, invoice_ids=None, progress=None):
+    def read_rows():
+        stream.seek(0)
+        return csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+
+    return load_invoice_rows(memgraph, read_rows, batch_size, stats, invoice_ids, progress)
+
+
+# Load a CSV file with load_invoice_rows, reading it chunk by chunk
+def load_invoice_csv(memgraph, csv_path, batch_size=DEFAULT_BATCH_SIZE):
+    with open(csv_path, mode='r', newline='', encoding='utf-8') as file:
+        def read_rows():
+            file.seek(0)
+            return csv.DictReader(file)
+
+        return load_invoice_rows(memgraph, read_rows, batch_size)
@@ -0,0 +1,150 @@
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from queryMetrics import name_query
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_QUERY = name_query('health_check', "RETURN 1 AS ok;")
+
+# metrics() keys that only ever grow, exported as Prometheus counters
+CUMULATIVE_METRICS = ('checkouts', 'timeouts', 'reconnects', 'wait_seconds_total')
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+# One pooled client plus the time it was last known to be healthy
+class PooledConnection:
+    def __init__(self, client):
+        self.client = client
+        self.checked_at = time.monotonic()
+
+
+# Fixed-size pool of Memgraph clients (each holds its own Bolt connection).
+# Connections are health-checked on checkout when idle for longer than
+# health_check_interval or after a failed query, and replaced if the check fails.
+class ConnectionPool:
+    def __init__(self, factory, max_size=8, checkout_timeout=5.0, health_check_interval=30.0):
+        self.factory = factory
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    def acquire(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        pooled = self._checkout(start + timeout)
+        waited = time.monotonic() - start
+
+        try:
+            if time.monotonic() - pooled.checked_at > self.health_check_interval:
+                pooled = self._ensure_healthy(pooled)
+        except Exception:
+            self._discard()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+        return pooled
+
+    # failed=True forces a health check before the connection is handed out again
+    def release(self, pooled, failed=False):
+        if failed:
+            pooled.checked_at = float('-inf')
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(pooled)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        pooled = self.acquire(timeout)
+        failed = False
+        try:
+            yield pooled.client
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(pooled, failed)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': self._size - self._in_use,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'reconnects': self._reconnects,
+                'wait_seconds_total': round(self._wait_seconds_total, 6),
+                'wait_seconds_avg': round(self._wait_seconds_total / self._checkouts, 6) if self._checkouts else 0.0,
+                'wait_seconds_max': round(self._wait_seconds_max, 6),
+            }
+
+    def _checkout(self, deadline):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._size < self.max_size:
+                self._size += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return PooledConnection(self.factory())
+            except Exception:
+                self._discard()
+                raise
+
+        try:
+            return self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeoutError(f"No Memgraph connection available within {self.checkout_timeout}s")
+
+    def _ensure_healthy(self, pooled):
+        if self._is_healthy(pooled.client):
+            pooled.checked_at = time.monotonic()
+            return pooled
+
+        logger.warning("Pooled Memgraph connection failed its health check, reconnecting")
+        with self._lock:
+            self._reconnects += 1
+        replacement = PooledConnection(self.factory())
+        if not self._is_healthy(replacement.client):
+            raise ConnectionError("Could not reconnect to Memgraph")
+        return replacement
+
+    @staticmethod
+    def _is_healthy(client):
+        try:
+            list(client.execute_and_fetch(HEALTH_CHECK_QUERY))
+            return True
+        except Exception:
+            return False
+
+    def _discard(self):
+        with self._lock:
+            self._size -= 1
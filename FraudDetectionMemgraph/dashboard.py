@@ -1,11 +1,28 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, session
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, g, stream_with_context
+from werkzeug.utils import secure_filename
 import os
+import time
+import uuid
 import csv
+import io
+import shutil
+import tempfile
 import random
+from array import array
 from faker import Faker
 from datetime import datetime, timedelta
-from gqlalchemy import Memgraph
 import logging
+from memgraphSchema import ensure_schema
+from fraudPrediction import DEFAULT_PREDICTION_BATCH_SIZE, predict_invoices
+from jobQueue import COMPLETED, JobQueue
+from bulkLoader import DEFAULT_BATCH_SIZE, StageStats, load_invoice_stream, to_int
+from embeddings import DEFAULT_HOPS, set_full_embeddings, set_incremental_embeddings
+from connectionPool import CUMULATIVE_METRICS, ConnectionPool
+from idAllocator import DEFAULT_BLOCK_SIZE, BlockAllocator, SequenceFile, VatNumbers, invoice_block_start, invoice_id_floor
+from graphReset import CLEAR_STAGES, DEFAULT_CLEAR_BATCH_SIZE, count, delete_in_batches, drop_graph
+from memgraphBackend import memgraph_factory
+from resultStore import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SORT_KEYS, ResultSet, ResultStore
+from queryMetrics import InstrumentedMemgraph, PlanSampler, QueryMetrics, RequestMetrics, name_query, name_query_prefix, render_prometheus
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -14,280 +31,616 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__)
 
-# Setup folders for file upload (host vs. container paths)
+# Setup folders for LOAD CSV uploads (host vs. container paths)
 host_upload_folder = './'
 container_upload_folder = '/memgraph/FraudDetectionMemgraph'
 os.makedirs(host_upload_folder, exist_ok=True)
 
-# Connect to Memgraph database
-memgraph = Memgraph("127.0.0.1", 7687)
+# Latency, row and error counts per named query and per route, served on /metrics.
+# QUERY_PROFILE_SAMPLE_RATE (0 to 1, default 0) captures the plan of that fraction
+# of the queries, served on /metrics/plans.
+query_metrics = QueryMetrics()
+request_metrics = RequestMetrics()
+plan_sampler = PlanSampler(float(os.environ.get('QUERY_PROFILE_SAMPLE_RATE', 0.0)))
+
+# Pool of Memgraph connections; every background job borrows its own.
+# MEMGRAPH_BACKEND=record|replay swaps the client for a recording or in-process one.
+memgraph_host = os.environ.get('MEMGRAPH_HOST', '127.0.0.1')
+memgraph_port = int(os.environ.get('MEMGRAPH_PORT', 7687))
+memgraph_connect = memgraph_factory(memgraph_host, memgraph_port)
+pool = ConnectionPool(
+    lambda: InstrumentedMemgraph(memgraph_connect(), query_metrics, plan_sampler),
+    max_size=int(os.environ.get('POOL_SIZE', 8)),
+    checkout_timeout=float(os.environ.get('POOL_TIMEOUT', 5.0)),
+    health_check_interval=float(os.environ.get('POOL_HEALTH_CHECK_INTERVAL', 30.0)),
+)
 
 app.secret_key = 'supersecretkey'
 
-fake = Faker()
-
-# Parameters for data generation
+# Number of invoices sent to node_classification.predict per query
+app.config['PREDICTION_BATCH_SIZE'] = int(os.environ.get('PREDICTION_BATCH_SIZE', DEFAULT_PREDICTION_BATCH_SIZE))
+
+# 'stream' sends uploaded rows over Bolt in batches, 'load_csv' saves the file to a
+# folder shared with the Memgraph container and imports it with LOAD CSV
+app.config['INGEST_MODE'] = os.environ.get('INGEST_MODE', 'stream')
+app.config['INGEST_BATCH_SIZE'] = int(os.environ.get('INGEST_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+# Uploads are buffered for the background job: in memory up to this many bytes,
+# then in a temporary file (under TMPDIR)
+app.config['UPLOAD_SPOOL_MEMORY'] = int(os.environ.get('UPLOAD_SPOOL_MEMORY', 16 * 1024 * 1024))
+
+# Uploads recompute the embeddings of the whole graph ('full'), the space the
+# classifier was trained on. 'incremental' only embeds the upload's new nodes,
+# faster on large graphs, but those vectors come from a separately trained
+# Word2Vec (see embeddings.set_incremental_embeddings), so predictions for them
+# are approximate and are not redone by a later POST /embeddings/recompute.
+app.config['EMBEDDING_MODE'] = os.environ.get('EMBEDDING_MODE', 'full')
+app.config['EMBEDDING_HOPS'] = int(os.environ.get('EMBEDDING_HOPS', DEFAULT_HOPS))
+
+# Prediction results per upload, kept server-side: the most recent uploads in
+# memory, older ones spilled to RESULT_SPILL_DIR (if set) and memory-mapped
+results = ResultStore(
+    max_uploads=int(os.environ.get('RESULT_STORE_MAX_UPLOADS', 20)),
+    max_rows=int(os.environ.get('RESULT_STORE_MAX_ROWS', 5000000)),
+    spill_dir=os.environ.get('RESULT_SPILL_DIR') or None,
+)
+
+# Upper bounds for /generate_csv?invoices=N&users=M
+app.config['GENERATE_MAX_INVOICES'] = int(os.environ.get('GENERATE_MAX_INVOICES', 5000000))
+app.config['GENERATE_MAX_USERS'] = int(os.environ.get('GENERATE_MAX_USERS', 100000))
+
+# Nodes or relationships deleted per transaction by POST /clear
+app.config['CLEAR_BATCH_SIZE'] = int(os.environ.get('CLEAR_BATCH_SIZE', DEFAULT_CLEAR_BATCH_SIZE))
+
+# Background workers for uploads, each one borrows a pooled connection per job
+jobs = JobQueue(
+    max_workers=int(os.environ.get('INGEST_WORKERS', 2)),
+    max_finished=int(os.environ.get('MAX_FINISHED_JOBS', 100)),
+)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_metrics.observe(route, request.method, response.status_code, time.perf_counter() - start)
+    return response
+
+
+# Default parameters for data generation
 num_users = 2
 num_invoices = 5
-used_vat_numbers = set()
 
-# Helper to generate a unique VAT ID
+# Invoice IDs and VAT numbers for generated CSVs come from ID blocks reserved in
+# the ID_SEQUENCE_FILE sidecar (ID_BLOCK_SIZE per write), so concurrent requests
+# and dashboard processes sharing the file never hand out the same value. The
+# invoice sequence starts above the largest invoiceID loaded when it is created,
+# and skips ahead when a new block overlaps invoices loaded since (memgraphLoad.py).
+id_block_size = int(os.environ.get('ID_BLOCK_SIZE', DEFAULT_BLOCK_SIZE))
+id_sequences = SequenceFile(os.environ.get('ID_SEQUENCE_FILE', os.path.join(host_upload_folder, 'id_sequences.json')))
 
-def generate_unique_vat_id():
-    while True:
-        vat_id = f"VAT{random.randint(100000000, 999999999)}"
-        if vat_id not in used_vat_numbers:
-            used_vat_numbers.add(vat_id)
-            return vat_id
 
-# Helper to generate a random datetime object
-def get_random_date(start_year=2020, end_year=2025):
-    year = random.randint(start_year, end_year)
-    month = random.randint(1, 12)
-    day = random.randint(1, 28)
-    hour = random.randint(0, 23)
-    minute = random.randint(0, 59)
-    second = random.randint(0, 59)
-    return datetime(year, month, day, hour, minute, second)
+def first_invoice_id():
+    with pool.connection() as memgraph:
+        return invoice_id_floor(memgraph)
 
 
-# Fetch and update global last invoice ID from Memgraph
-last_invoice_id = 2000
+def check_invoice_block(first, end):
+    with pool.connection() as memgraph:
+        return invoice_block_start(memgraph, first, end)
 
-def get_last_invoice_id():
-    global last_invoice_id
-    try:
-        query = "MATCH (i:Invoice) RETURN MAX(i.invoiceID) AS max_invoice_id"
-        result = memgraph.execute_and_fetch(query)
-        max_id = next(result, {}).get("max_invoice_id", 0)
-        last_invoice_id = max_id if max_id is not None else 0
-    except Exception as e:
-        logger.error(f"Error fetching last invoice ID: {str(e)}")
-        last_invoice_id = 0
 
+invoice_ids = BlockAllocator(id_sequences, 'invoice', id_block_size, start=first_invoice_id, check=check_invoice_block)
+vat_numbers = VatNumbers(BlockAllocator(id_sequences, 'vat', id_block_size))
 
-# Generate synthetic CSV data for users and invoices
-def generate_csv_data(num_invoices_to_generate=num_invoices):
-    global last_invoice_id
+# Helper to generate a random datetime object
+def get_random_date(start_year=2020, end_year=2025, rng=random):
+    year = rng.randint(start_year, end_year)
+    month = rng.randint(1, 12)
+    day = rng.randint(1, 28)
+    hour = rng.randint(0, 23)
+    minute = rng.randint(0, 59)
+    second = rng.randint(0, 59)
+    return datetime(year, month, day, hour, minute, second)
 
-    get_last_invoice_id()
 
-    users = []
-    for user_id in range(1, num_users + 1):
-        user_name = fake.name()
-        email = fake.unique.email()
-        phone_number = fake.phone_number()
-        registration_date = get_random_date().strftime('%Y-%m-%d %H:%M:%S')
-        vat_number = generate_unique_vat_id()
-        users.append([user_id, user_name, email, phone_number, registration_date, vat_number])
+CSV_HEADER = [
+    'user_id', 'user_name', 'email', 'phone_number', 'registration_date', 'vat_number',
+    'invoice_id', 'invoice_date', 'total_amount', 'supplier_iban', 'supplier_name',
+    'status', 'due_date', 'supplier_tax_id'
+]
+
+# Rows written to the response per chunk, and invoice IDs reserved at a time
+GENERATE_CHUNK_SIZE = 1000
+
+
+# Synthetic users, indexed by user ID. seed makes every random field reproducible;
+# VAT numbers and invoice IDs always come from the allocators.
+def generate_users(count, rng, faker):
+    users = {}
+    emails = set()  # distinct within the file, without Faker's ever-growing unique cache
+    for user_id, vat_number in enumerate(vat_numbers.allocate(count), start=1):
+        email = faker.email()
+        while email in emails:
+            email = faker.email()
+        emails.add(email)
+        registration_date = get_random_date(rng=rng).strftime('%Y-%m-%d %H:%M:%S')
+        users[user_id] = [user_id, faker.name(), email, faker.phone_number(), registration_date, vat_number]
+    return users
+
+
+# Yield one CSV row per invoice; only the users and one chunk of invoice IDs are
+# held in memory, so the row count does not affect memory use
+def generate_csv_rows(users, num_invoices_to_generate, rng, faker, first_ids=None):
+    remaining = num_invoices_to_generate
+    ids = first_ids
+    while remaining > 0:
+        ids = ids or invoice_ids.allocate(min(GENERATE_CHUNK_SIZE, remaining))
+        for invoice_id in ids:
+            user = users[rng.randint(1, len(users))]
+            invoice_date = get_random_date(2023, 2025, rng)
+            total_amount = round(rng.uniform(50, 5000), 2)
+            supplier_name = faker.company()
+            supplier_iban = faker.iban()
+            status = rng.choices(['paid', 'pending', 'overdue'], weights=[0.7, 0.2, 0.1])[0]
+            due_date = invoice_date + timedelta(days=rng.randint(14, 60))
+            supplier_tax_id = users[rng.randint(1, len(users))][5]
+            yield user + [invoice_id, invoice_date.strftime('%Y-%m-%d %H:%M:%S'), total_amount, supplier_iban,
+                          supplier_name, status, due_date.strftime('%Y-%m-%d %H:%M:%S'), supplier_tax_id]
+        remaining -= len(ids)
+        ids = None
+
+
+# CSV text in chunks of chunk_size rows, for streamed responses. The status line
+# is already sent when rows fail (e.g. an ID block cannot be reserved), so the
+# error is re-raised: the server then aborts the chunked response and the client
+# sees a failed transfer instead of a short CSV that still parses.
+def stream_csv(header, rows, chunk_size=GENERATE_CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    number = 0
+    try:
+        for number, row in enumerate(rows, start=1):
+            writer.writerow(row)
+            if number % chunk_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    except Exception as e:
+        logger.error(f"CSV stream stopped after {number} rows: {str(e)}")
+        raise
+    yield buffer.getvalue()
+
+
+LOAD_MODEL_QUERY = name_query('load_model', """
+    CALL node_classification.load_model()
+    YIELD path
+    RETURN path;
+""")
+
+# Load existing node classification model into Memgraph (for fraud detection);
+# returns the model path, or None if no model was saved. Errors are raised.
+def load_fraud_model(memgraph):
+    result = memgraph.execute_and_fetch(LOAD_MODEL_QUERY)
+    model_path = next(result, {}).get("path", None)
+
+    if model_path:
+        logger.info(f"Model loaded from: {model_path}")
+    else:
+        logger.warning("No model found, make sure to train one first.")
+    return model_path
+
+# Create the indexes and constraints used by the upload queries
+def init_schema(memgraph):
+    try:
+        ensure_schema(memgraph)
+    except Exception as e:
+        logger.error(f"Error creating indexes and constraints: {str(e)}")
 
+# Prepare the schema and load the model at app startup
+try:
+    with pool.connection() as startup_memgraph:
+        init_schema(startup_memgraph)
+        try:
+            load_fraud_model(startup_memgraph)
+        except Exception as e:
+            logger.error(f"Error loading model: {str(e)}")
+except Exception as e:
+    logger.error(f"Error preparing Memgraph at startup: {str(e)}")
 
-    # Create fake invoices linked to users
-    invoices = []
-    for _ in range(num_invoices_to_generate):
-        last_invoice_id += 1  
+# Read a positive integer query argument, bounded by maximum
+def int_arg(name, default, maximum):
+    value = int(request.args.get(name, default))
+    if not 1 <= value <= maximum:
+        raise ValueError(f"{name} must be between 1 and {maximum}")
+    return value
 
-        user_id = random.randint(1, num_users)
-        invoice_date = get_random_date(2023, 2025).strftime('%Y-%m-%d %H:%M:%S')
-        total_amount = round(random.uniform(50, 5000), 2)
-        supplier_name = fake.company()
-        supplier_iban = fake.iban()
-        status_weights = [0.7, 0.2, 0.1]
-        status = random.choices(['paid', 'pending', 'overdue'], weights=status_weights)[0]
-        due_date = (datetime.strptime(invoice_date, '%Y-%m-%d %H:%M:%S') + timedelta(days=random.randint(14, 60))).strftime('%Y-%m-%d %H:%M:%S')
-        supplier_tax_id = random.choice(users)[5]
 
-        invoices.append([last_invoice_id, user_id, invoice_date, total_amount, supplier_iban, supplier_name, status, due_date, supplier_tax_id])
+# Route to generate and download a fake invoice CSV, e.g.
+# /generate_csv?invoices=1000000&users=500&seed=42. Rows are streamed to the
+# client while they are generated; nothing is written on the server.
+@app.route('/generate_csv', methods=['GET'])
+def generate_csv():
+    try:
+        invoices_to_generate = int_arg('invoices', num_invoices, app.config['GENERATE_MAX_INVOICES'])
+        users_to_generate = int_arg('users', num_users, app.config['GENERATE_MAX_USERS'])
+        seed = request.args.get('seed', '')
+        seed = int(seed) if seed != '' else None
+    except ValueError as e:
+        return request_error(str(e))
+
+    rng = random.Random(seed)
+    faker = Faker()
+    faker.seed_instance(seed)
+
+    # Reserve the users' VAT numbers and the first invoice IDs before the response
+    # starts, so that an unreachable Memgraph is still reported as an error
+    try:
+        users = generate_users(users_to_generate, rng, faker)
+        first_ids = invoice_ids.allocate(min(GENERATE_CHUNK_SIZE, invoices_to_generate))
+    except Exception as e:
+        logger.error(f"Error reserving invoice IDs: {str(e)}")
+        return request_error(f'Could not reserve invoice IDs in Memgraph: {str(e)}')
+
+    logger.info(f"Streaming a CSV of {invoices_to_generate} invoices for {users_to_generate} users")
+    rows = generate_csv_rows(users, invoices_to_generate, rng, faker, first_ids)
+    headers = {'Content-Disposition': 'attachment; filename="InvoicesNoFraud.csv"'}
+    return Response(stream_with_context(stream_csv(CSV_HEADER, rows)), mimetype='text/csv', headers=headers)
+
+# LOAD CSV import of an uploaded file, read by Memgraph from the shared upload folder.
+# Keyed MERGE like bulkLoader.py: re-uploading an invoice keeps the existing node
+# instead of violating the Invoice.invoiceID uniqueness constraint.
+name_query_prefix('load_csv', 'LOAD CSV FROM')
+
+def build_upload_query(filename):
+    return f"""
+        LOAD CSV FROM "{container_upload_folder}/{filename}" WITH HEADER AS row
+        MERGE (i:Invoice {{invoiceID: toInteger(row.invoice_id)}})
+        ON CREATE SET
+            i.invoiceDate = row.invoice_date,
+            i.totalAmount = toFloat(row.total_amount),
+            i.supplierIBAN = row.supplier_iban,
+            i.status = row.status,
+            i.dueDate = row.due_date,
+            i.supplierTAXID = row.supplier_tax_id,
+            i.fraud = COALESCE(toInteger(row.fraud), -1)
+        MERGE (u:User {{userID: toInteger(row.user_id)}})
+        ON CREATE SET
+            u.VATNumber = row.vat_number,
+            u.userName = row.user_name,
+            u.email = row.email,
+            u.phoneNumber = row.phone_number,
+            u.registrationDate = row.registration_date,
+            u.fraud = COALESCE(toInteger(row.fraud), -1)
+        MERGE (i)-[:UPLOADED_BY]->(u)
+        WITH i, u, row
+        MATCH (user_to_pay:User {{VATNumber: i.supplierTAXID}})
+        WHERE user_to_pay.VATNumber IS NOT NULL AND i.supplierTAXID IS NOT NULL
+        MERGE (i)-[:NEEDS_PAYMENT_FROM]->(user_to_pay);
+    """
+
+
+# Background ingest pipeline for one uploaded file: import, embeddings, prediction
+def run_upload_job(job, filepath, filename):
+    with pool.connection() as memgraph:
+        try:
+            with job.run_stage('load_csv'):
+                with open(filepath, mode='r', newline='', encoding='utf-8') as file:
+                    invoice_ids = array('q', (to_int(row['invoice_id']) for row in csv.DictReader(file)))
+                job.add_rows(len(invoice_ids))
+                memgraph.execute(build_upload_query(filename))
+        finally:
+            os.remove(filepath)
+
+        return embed_and_predict(job, memgraph, invoice_ids)
+
+
+# Background ingest of a buffered upload: send it to Memgraph in parameterized
+# batches, then embeddings and prediction. Batches are committed one by one, so
+# a failure part-way reports how many invoices were already imported.
+def run_streamed_upload_job(job, spool):
+    invoice_ids = array('q')
+    stats = StageStats()
+    try:
+        with pool.connection() as memgraph:
+            with job.run_stage('ingest') as record:
+                start = time.perf_counter()
+                try:
+                    load_invoice_stream(memgraph, spool, app.config['INGEST_BATCH_SIZE'], stats, invoice_ids, job.add_rows)
+                except Exception as e:
+                    record['partial'] = True
+                    raise RuntimeError(f"Import stopped after {len(invoice_ids)} invoices, which stay in the graph: {str(e)}") from e
+                seconds = time.perf_counter() - start
+                record['rows_per_sec'] = round(len(invoice_ids) / seconds, 1) if seconds > 0 else 0.0
+                record['queries'] = stats.as_dict()
+            logger.info(f"Streamed {len(invoice_ids)} rows into Memgraph in {seconds:.2f}s ({record['rows_per_sec']} rows/sec)")
+
+            return embed_and_predict(job, memgraph, invoice_ids)
+    finally:
+        spool.close()
+
+
+# invoice_ids are the invoices of this upload: the start of the incremental walks
+# and the only invoices classified, so concurrent uploads never predict (or store
+# results for) each other's invoices
+def embed_and_predict(job, memgraph, invoice_ids):
+    with job.run_stage('embeddings'):
+        if app.config['EMBEDDING_MODE'] == 'full':
+            set_full_embeddings(memgraph)
+        else:
+            job.add_rows(set_incremental_embeddings(memgraph, invoice_ids, app.config['EMBEDDING_HOPS']))
 
+    with job.run_stage('prediction'):
+        if not invoice_ids:
+            logger.warning("No new invoices found for prediction.")
 
-    # Combine user and invoice data into a final dataset
-    output_data = []
-    for invoice in invoices:
-        invoice_id, user_id, invoice_date, total_amount, supplier_iban, supplier_name, status, due_date, supplier_tax_id = invoice
-        user = next((u for u in users if u[0] == user_id), None)
-        if user:
-            user_id, user_name, email, phone_number, registration_date, vat_number = user
-            output_data.append([user_id, user_name, email, phone_number, registration_date, vat_number, invoice_id, invoice_date, total_amount, supplier_iban, supplier_name, status, due_date, supplier_tax_id])
+        predicted_ids, predicted_classes = array('q'), array('b')
+        for result in predict_invoices(memgraph, invoice_ids, app.config['PREDICTION_BATCH_SIZE']):
+            predicted_ids.append(result['invoiceID'])
+            predicted_classes.append(result['predicted_class'])
+            job.add_rows(1)
 
-    return output_data
+    # Only the counts stay on the job; the rows are served by /results/<job id>
+    result_set = ResultSet(predicted_ids, predicted_classes)
+    results.put(job.id, result_set)
+    return {'results': result_set.summary()}
 
 
-# Load existing node classification model into Memgraph (for fraud detection)
-def load_fraud_model():
+# Copy the uploaded CSV into a spooled buffer, so that the request only reads
+# the body and the import runs in a job, independent of the HTTP connection
+def spool_upload(stream):
+    spool = tempfile.SpooledTemporaryFile(max_size=app.config['UPLOAD_SPOOL_MEMORY'])
     try:
-        cypher_query = """
-            CALL node_classification.load_model()
-            YIELD path
-            RETURN path;
-        """
-        result = memgraph.execute_and_fetch(cypher_query)
-        model_path = next(result, {}).get("path", None)
-
-        if model_path:
-            logger.info(f"Model loaded from: {model_path}")
-        else:
-            logger.warning("No model found, make sure to train one first.")
-    except Exception as e:
-        logger.error(f"Error loading model: {str(e)}")
+        shutil.copyfileobj(stream, spool, 1024 * 1024)
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+    return spool
 
-# Load model at app startup
-load_fraud_model()
 
-# Route to generate and download fake invoice CSV
-@app.route('/generate_csv', methods=['GET'])
-def generate_csv():
+# JSON clients get the job ID back, browsers are sent to the dashboard which polls the job
+def wants_json():
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return best == 'application/json'
 
-    output_data = generate_csv_data()
-
-    filename = 'InvoicesNoFraud.csv'
-    with open(filename, mode='w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow([
-            'user_id', 'user_name', 'email', 'phone_number', 'registration_date', 'vat_number',
-            'invoice_id', 'invoice_date', 'total_amount', 'supplier_iban', 'supplier_name',
-            'status', 'due_date', 'supplier_tax_id'
-        ])
-        for row in output_data:
-            writer.writerow(row)
 
-    logger.info(f"CSV file '{filename}' created successfully")
+def request_error(message):
+    if wants_json():
+        return jsonify({'error': message}), 400
+    flash(message)
+    return redirect(url_for('index'))
 
-    return send_file(filename, as_attachment=True)
 
-# Route to handle file upload and trigger graph import + model prediction
+# Route to handle file upload. The CSV (raw text/csv body or multipart form) is
+# buffered and streamed into Memgraph by a background job, or saved for LOAD CSV
+# (INGEST_MODE=load_csv); embeddings and model prediction run in the same job.
 @app.route('/upload', methods=['POST'])
 def upload():
-    if 'file' not in request.files:
-        flash('No file part')
-        return redirect(url_for('index'))
-    
-    file = request.files['file']
-    if file.filename == '':
-        flash('No selected file')
-        return redirect(url_for('index'))
-    
-    if file:
-        filepath = os.path.join(host_upload_folder, file.filename)
+    if request.mimetype == 'text/csv':
+        stream, original_name = request.stream, 'request body'
+    else:
+        if 'file' not in request.files:
+            return request_error('No file part')
+
+        file = request.files['file']
+        if file.filename == '':
+            return request_error('No selected file')
+        stream, original_name = file.stream, file.filename
+
+    if app.config['INGEST_MODE'] == 'load_csv' and request.mimetype != 'text/csv':
+        # Unique name so concurrent uploads of the same file do not overwrite each other
+        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+        filepath = os.path.join(host_upload_folder, filename)
         file.save(filepath)
-
+        job = jobs.submit('upload', run_upload_job, filepath, filename)
+    else:
         try:
-            print(f"{container_upload_folder}/{file.filename}")
-            cypher_query = f"""
-                LOAD CSV FROM "{container_upload_folder}/{file.filename}" WITH HEADER AS row
-                CREATE (i:Invoice {{invoiceID: toInteger(row.invoice_id)}})
-                SET
-                    i.invoiceDate = row.invoice_date,
-                    i.totalAmount = toFloat(row.total_amount),
-                    i.supplierIBAN = row.supplier_iban,
-                    i.status = row.status,
-                    i.dueDate = row.due_date,
-                    i.supplierTAXID = row.supplier_tax_id,
-                    i.fraud = COALESCE(toInteger(row.fraud), -1)
-                MERGE (u:User {{userID: toInteger(row.user_id)}})
-                ON CREATE SET
-                    u.VATNumber = row.vat_number,
-                    u.userName = row.user_name,
-                    u.email = row.email,
-                    u.phoneNumber = row.phone_number,
-                    u.registrationDate = row.registration_date,
-                    u.fraud = COALESCE(toInteger(row.fraud), -1)
-                CREATE (i)-[:UPLOADED_BY]->(u)
-                WITH i, u, row
-                MATCH (user_to_pay:User {{VATNumber: i.supplierTAXID}})
-                WHERE user_to_pay.VATNumber IS NOT NULL AND i.supplierTAXID IS NOT NULL
-                CREATE (i)-[:NEEDS_PAYMENT_FROM]->(user_to_pay);
-            """
+            spool = spool_upload(stream)
+        except Exception as e:
+            logger.error(f"Error receiving {original_name}: {str(e)}")
+            return request_error(f'Error while receiving the CSV: {str(e)}')
+        job = jobs.submit('upload', run_streamed_upload_job, spool)
+
+    logger.info(f"Queued upload job {job.id} for {original_name}")
+
+    if wants_json():
+        return jsonify({'job_id': job.id, 'status_url': url_for('job_status', job_id=job.id)}), 202
+    return redirect(url_for('index', job=job.id))
+
+
+# Status of a background job: current stage, rows processed, timings and final results
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job.to_dict())
+
+
+# Full node2vec recompute over the whole graph, e.g. triggered nightly by a scheduler
+def run_full_embeddings_job(job):
+    with pool.connection() as memgraph, job.run_stage('embeddings'):
+        set_full_embeddings(memgraph)
+
+
+@app.route('/embeddings/recompute', methods=['POST'])
+def recompute_embeddings():
+    job = jobs.submit('embeddings', run_full_embeddings_job)
+    logger.info(f"Queued full embedding recompute job {job.id}")
+    return jsonify({'job_id': job.id, 'status_url': url_for('job_status', job_id=job.id)}), 202
+
+
+# Connection pool size, in-use count and checkout wait times
+@app.route('/pool', methods=['GET'])
+def pool_metrics():
+    return jsonify(pool.metrics())
+
+
+# Prometheus metrics: query latency histograms, row and error counts per query name,
+# request latency per route, connection pool gauges and counters
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    pool_metrics = pool.metrics()
+    gauges = {
+        f"memgraph_pool_{key}": (f"Connection pool {key.replace('_', ' ')}.", value)
+        for key, value in pool_metrics.items() if key not in CUMULATIVE_METRICS
+    }
+    gauges.update({
+        f"result_store_{key}": (f"Result store {key.replace('_', ' ')}.", value)
+        for key, value in results.metrics().items()
+    })
+    counters = {
+        f"memgraph_pool_{key.removesuffix('_total')}_total": (f"Connection pool {key.replace('_', ' ')}.", pool_metrics[key])
+        for key in CUMULATIVE_METRICS
+    }
+    body = render_prometheus(query_metrics, request_metrics, gauges, counters)
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+# Most recent PROFILE/EXPLAIN plans captured per query (QUERY_PROFILE_SAMPLE_RATE > 0)
+@app.route('/metrics/plans', methods=['GET'])
+def query_plans():
+    return jsonify(plan_sampler.as_dict())
+
+
+# Round trips and batch sizes per query, when running with a recording or replay backend
+@app.route('/backend', methods=['GET'])
+def backend_metrics():
+    if memgraph_connect.recorder is None:
+        return jsonify({'error': 'Query recording is off (MEMGRAPH_BACKEND=memgraph)'}), 404
+    return jsonify(memgraph_connect.recorder.summary())
+
+
+# Page, page size, sort order and predicted_class filter from the query string
+def result_page_args():
+    per_page = int(request.args.get('per_page', DEFAULT_PAGE_SIZE))
+    if not 1 <= per_page <= MAX_PAGE_SIZE:
+        raise ValueError(f"per_page must be between 1 and {MAX_PAGE_SIZE}")
+    sort = request.args.get('sort', 'invoiceID')
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+    order = request.args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+    predicted_class = request.args.get('predicted_class', '')
+    return {
+        'page': int(request.args.get('page', 1)),
+        'per_page': per_page,
+        'sort': sort,
+        'descending': order == 'desc',
+        'predicted_class': int(predicted_class) if predicted_class != '' else None,
+    }
+
+
+# One page of an upload's predictions, e.g. /results/<job id>?predicted_class=1&sort=invoiceID&order=desc
+@app.route('/results/<upload_id>', methods=['GET'])
+def result_page(upload_id):
+    result_set = results.get(upload_id)
+    if result_set is None:
+        return jsonify({'error': 'Unknown or expired upload'}), 404
+    try:
+        args = result_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(dict(result_set.page(**args), upload_id=upload_id))
+
+
+# Every matching prediction of an upload as CSV, written while it is being sent
+@app.route('/results/<upload_id>/export.csv', methods=['GET'])
+def export_results(upload_id):
+    result_set = results.get(upload_id)
+    if result_set is None:
+        return jsonify({'error': 'Unknown or expired upload'}), 404
+    try:
+        args = result_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-            try:
-                memgraph.execute(cypher_query)
-            except Exception as e:
-                print(f"Error executing the Cypher query: {str(e)}")
-                flash(f'Error executing the Cypher query: {str(e)}')
-                return redirect(url_for('index'))
-            try:
-                memgraph.execute("""
-                    CALL node2vec.set_embeddings(
-                        False,        
-                        1.0,            
-                        1.0,            
-                        5,             
-                        20,             
-                        64,            
-                        0.025,          
-                        5,             
-                        1,             
-                        1,             
-                        4,             
-                        0.0001,        
-                        1,             
-                        0,             
-                        5,             
-                        5,             
-                        "weight"        
-                    )
-                    YIELD *;
-                """)
-            except Exception as e:
-                print(f"Error executing the Cypher query: {str(e)}")
-                flash(f'Error executing the Cypher query: {str(e)}')
-                return redirect(url_for('index'))
-            
-            
-            fetch_new_invoice_ids_query = """
-                MATCH (i:Invoice)
-                WHERE i.fraud = -1
-                RETURN i.invoiceID AS invoiceID;
-            """
-            new_invoices = memgraph.execute_and_fetch(fetch_new_invoice_ids_query)
-            invoice_ids = [invoice['invoiceID'] for invoice in new_invoices]
-
-            if not invoice_ids:
-                logger.warning("No new invoices found for prediction.")
-                return redirect(url_for('index'))
-
-            fraud_results = []
-            for invoice_id in invoice_ids:
-                prediction_query = f"""
-                    MATCH (n:Invoice {{invoiceID: {invoice_id}}})
-                    CALL node_classification.predict(n)
-                    YIELD predicted_class
-                    SET n.fraud = predicted_class
-                    RETURN n.invoiceID AS invoiceID, predicted_class;
-                """
-                prediction_result = memgraph.execute_and_fetch(prediction_query)
-                fraud_results.extend(prediction_result)
-
-            session['fraud_results'] = fraud_results
-
-            return redirect(url_for('index'))
+    chunks = result_set.iter_chunks(predicted_class=args['predicted_class'], sort=args['sort'], descending=args['descending'])
+    rows = ((row['invoiceID'], row['predicted_class']) for chunk in chunks for row in chunk)
+    headers = {'Content-Disposition': f'attachment; filename="fraud_results_{upload_id}.csv"'}
+    return Response(stream_with_context(stream_csv(['invoice_id', 'predicted_class'], rows, 10000)), mimetype='text/csv', headers=headers)
 
-        except Exception as e:
-            flash(f'Error: {str(e)}')
-            return redirect(url_for('index'))
 
 # Main dashboard route
 @app.route('/')
 def index():
-    fraud_results = session.pop('fraud_results', [])
-    return render_template('index.html', fraud_results=fraud_results)
+    job = jobs.get(request.args.get('job', ''))
+    page = None
+    if job is not None and job.status == COMPLETED:
+        result_set = results.get(job.id)
+        if result_set is not None:
+            try:
+                args = result_page_args()
+            except ValueError as e:
+                flash(str(e))
+                args = {}
+            page = dict(result_set.page(**args), summary=result_set.summary())
+            page['sort'] = args.get('sort', 'invoiceID')
+            page['order'] = 'desc' if args.get('descending') else 'asc'
+            page['predicted_class'] = args.get('predicted_class')
+
+    # Link to the dashboard with the current filter, sort and page size, changed by
+    # the given arguments (a new filter or sort order starts again from page 1)
+    def results_url(endpoint='index', **changes):
+        params = {'page': 1, 'per_page': page['per_page'], 'sort': page['sort'], 'order': page['order'], 'predicted_class': page['predicted_class']}
+        params.update(changes)
+        if endpoint == 'index':
+            params['job'] = job.id
+        else:
+            params['upload_id'] = job.id
+            params.pop('page')
+            params.pop('per_page')
+        return url_for(endpoint, **{key: value for key, value in params.items() if value is not None})
+
+    return render_template('index.html', results=page, results_url=results_url, job=job.to_dict(include_result=False) if job else None)
         
 
+# Delete the graph in bounded transactions, relationships first; each stage
+# reports the rows deleted so far out of the total counted when it started
+def run_clear_job(job, batch_size):
+    with pool.connection() as memgraph:
+        for stage, count_query, delete_query in CLEAR_STAGES:
+            with job.run_stage(stage, total=count(memgraph, count_query)):
+                for deleted in delete_in_batches(memgraph, delete_query, batch_size):
+                    job.add_rows(deleted)
+
+
+# DROP GRAPH, then re-create the indexes and constraints and reload the saved model;
+# the job fails if the model cannot be reloaded, since predictions would fail after it
+def run_reset_job(job):
+    with pool.connection() as memgraph:
+        with job.run_stage('drop_graph'):
+            drop_graph(memgraph)
+        with job.run_stage('schema'):
+            ensure_schema(memgraph)
+        with job.run_stage('model'):
+            if not load_fraud_model(memgraph):
+                raise RuntimeError("No saved node classification model to reload, train one with memgraphLoad.py")
+
+
+# Wipe the graph as a background job: batched deletes by default, or mode=reset
+# for the DROP GRAPH fast path (needs no other open transaction)
 @app.route('/clear', methods=['POST'])
 def clear_data():
-    try:
-        cypher_query = """
-        MATCH (n)
-        DETACH DELETE n
-        """
-        
-        memgraph.execute(cypher_query)
-        
-        flash('All data successfully removed from Memgraph!')
-        return redirect(url_for('index'))
-    
-    except Exception as e:
-        flash(f'Error while clearing data: {str(e)}')
-        return redirect(url_for('index'))
+    mode = request.values.get('mode', 'batched')
+    if mode == 'reset':
+        job = jobs.submit('reset', run_reset_job)
+    elif mode == 'batched':
+        job = jobs.submit('clear', run_clear_job, app.config['CLEAR_BATCH_SIZE'])
+    else:
+        return request_error(f"Unknown clear mode '{mode}', expected 'batched' or 'reset'")
+    logger.info(f"Queued {job.kind} job {job.id}")
+
+    if wants_json():
+        return jsonify({'job_id': job.id, 'status_url': url_for('job_status', job_id=job.id)}), 202
+    return redirect(url_for('index', job=job.id))
 
 
 if __name__ == '__main__':
@@ -1,14 +1,25 @@
+import argparse
 import csv
+import multiprocessing
+import os
 import random
+import numpy as np
+from collections import deque
 from faker import Faker
 from datetime import datetime, timedelta
 
 fake = Faker()
 
-num_users = 1000 # Number of users to generate
-num_invoices = 1500 # Number of invoices to generate
+num_users = 1000 # Default number of users to generate
+num_invoices = 1500 # Default number of invoices to generate
 used_vat_numbers = set() # To keep track of unique VAT numbers
-fraud_patterns = {} # Dictionary to track various fraud patterns
+SUSPICIOUS_VAT_SUFFIXES = ["000", "999", "123", "111", "222"]
+
+CSV_HEADER = [
+    'user_id', 'user_name', 'email', 'phone_number', 'registration_date', 'vat_number',
+    'invoice_id', 'invoice_date', 'total_amount', 'supplier_iban', 'supplier_name',
+    'status', 'due_date', 'supplier_tax_id', 'fraud'
+]
 
 # Function to generate a unique VAT ID
 def generate_unique_vat_id():
@@ -18,6 +29,13 @@ def generate_unique_vat_id():
             used_vat_numbers.add(vat_id)
             return vat_id
 
+# memgraphSchema.py makes User.VATNumber unique, so a repeated number would
+# make memgraphLoad.py abort halfway through the load
+def check_unique_vats(vat_numbers):
+    duplicates = len(vat_numbers) - len(set(vat_numbers))
+    if duplicates:
+        raise ValueError(f"{duplicates} VAT numbers are shared by more than one user")
+
 # Function to generate a random date within a given year range
 def get_random_date(start_year=2020, end_year=2025):
     year = random.randint(start_year, end_year)
@@ -28,227 +46,704 @@ def get_random_date(start_year=2020, end_year=2025):
     second = random.randint(0, 59)
     return datetime(year, month, day, hour, minute, second)
 
-# Generate user data
-users = []
-for user_id in range(1, num_users + 1):
-    user_name = fake.name()
-    email = fake.unique.email()
-    is_fraud_user = 0
-
-    # Randomly introduce fraudulent patterns in email
-    if random.random() < 0.15:
-        is_fraud_user = 1
-        fraud_patterns['suspicious_email'] = fraud_patterns.get('suspicious_email', 0) + 1
-        
-        # Generate suspicious email patterns for fraud users
-        email_pattern = random.choice([
-            f"{fake.first_name().lower()}{random.randint(1000, 9999)}@gmail.com",
-            f"{user_name.replace(' ', '').lower()}{random.choice(['123', '999', '007'])}@mail.com", 
-            f"{fake.word()}{fake.word()}@{random.choice(['freemail.com', 'examplemail.com', 'tempmail.net'])}",
-            f"{fake.first_name().lower()}.{random.randint(100, 999)}@{fake.domain_name()}", 
-            f"{fake.word()}.{fake.word()}{random.randint(1, 99)}@gmail.com",
-        ])
-        email = email_pattern
-    
-    # Randomly introduce fraudulent phone number patterns
-    phone_number = fake.phone_number()
-    if random.random() < 0.1 and is_fraud_user == 0:
-        is_fraud_user = 1
-        fraud_patterns['invalid_phone'] = fraud_patterns.get('invalid_phone', 0) + 1
-        
-        phone_pattern = random.choice([
-            "0000000000",
-            "1234567890",
-            "+00 000 000 0000", 
-            "123-456-7890",
-            "999-999-9999",
-            phone_number[:-5] + "00000" 
-        ])
-        phone_number = phone_pattern
-    
-    # Generate registration date and apply suspicious pattern
-    registration_date = get_random_date().strftime('%Y-%m-%d %H:%M:%S')
-    vat_number = generate_unique_vat_id()
-    
-    # Randomly introduce fraudulent registration patterns
-    if random.random() < 0.08 and is_fraud_user == 0:
-        is_fraud_user = 1
-        fraud_patterns['suspicious_registration'] = fraud_patterns.get('suspicious_registration', 0) + 1
-        
-        registration_datetime = datetime.strptime(registration_date, '%Y-%m-%d %H:%M:%S')
-        suspicious_hour = random.randint(2, 4)
-        registration_datetime = registration_datetime.replace(hour=suspicious_hour, minute=random.randint(0, 59))
-        registration_date = registration_datetime.strftime('%Y-%m-%d %H:%M:%S')
-    
-    # Randomly introduce suspicious VAT numbers
-    if random.random() < 0.07 and is_fraud_user == 0:
-        is_fraud_user = 1
-        fraud_patterns['suspicious_vat'] = fraud_patterns.get('suspicious_vat', 0) + 1
-        
-        last_digits = random.choice(["000", "999", "123", "111", "222"])
-        vat_number = f"VAT{vat_number[3:-3]}{last_digits}"
-    
-    users.append([user_id, user_name, email, phone_number, registration_date, vat_number, is_fraud_user])
-
-# Generate invoice data
-invoices = []
-recent_invoices = {}
-
-# Generate a list of invoices for users
-for i in range(num_invoices):
-    invoice_id = i + 1
-    user_id = random.randint(1, num_users)
-    invoice_date = get_random_date(2023, 2025).strftime('%Y-%m-%d %H:%M:%S')
-    total_amount = round(random.uniform(50, 5000), 2)
-    is_fraud_invoice = 0
-    
-    user = next((u for u in users if u[0] == user_id), None)
-    
-    # Randomly introduce fraudulent invoice patterns (amount)
-    if random.random() < 0.12:
-        is_fraud_invoice = 1
-        fraud_patterns['suspicious_amount'] = fraud_patterns.get('suspicious_amount', 0) + 1
-        
-        amount_pattern = random.choice([
-            round(random.uniform(9900, 10100), 2), 
-            round(random.uniform(15000, 25000), 2), 
-            round(random.uniform(1, 10), 2), 
-            round(float(random.choice([1111.11, 2222.22, 3333.33, 4444.44, 5555.55])), 2), 
-            round(random.choice([99.99, 199.99, 299.99, 399.99, 499.99]), 2)
-        ])
-        total_amount = amount_pattern
-    
-    supplier_name = fake.company()
-    supplier_iban = fake.iban()
-    
-    # Randomly introduce fraudulent IBAN patterns
-    if random.random() < 0.08 and is_fraud_invoice == 0:
-        is_fraud_invoice = 1
-        fraud_patterns['suspicious_iban'] = fraud_patterns.get('suspicious_iban', 0) + 1
-        
-        country_code = random.choice(["XX", "YY", "ZZ", "00"])
-        check_digits = random.choice(["00", "99", "01"])
-        rest_of_iban = ''.join(random.choices("0123456789", k=20))
-        supplier_iban = f"{country_code}{check_digits}{rest_of_iban}"
-    
-    status_weights = [0.7, 0.2, 0.1]
-    status = random.choices(['paid', 'pending', 'overdue'], weights=status_weights)[0]
-    
-    invoice_datetime = datetime.strptime(invoice_date, '%Y-%m-%d %H:%M:%S')
-    
-    # Randomly introduce date inconsistencies
-    if random.random() < 0.07 and is_fraud_invoice == 0:
-        is_fraud_invoice = 1
-        fraud_patterns['date_inconsistency'] = fraud_patterns.get('date_inconsistency', 0) + 1
-        
-        days_before = random.randint(1, 60)
-        due_date = (invoice_datetime - timedelta(days=days_before)).strftime('%Y-%m-%d %H:%M:%S')
-    else:
-        days_after = random.randint(14, 60)
-        due_date = (invoice_datetime + timedelta(days=days_after)).strftime('%Y-%m-%d %H:%M:%S')
-    
-    if is_fraud_invoice == 1 and random.random() < 0.5:
-        supplier_tax_id = f"VAT{random.choice(['000000000', '123456789', '999999999'])}"
-    else:
-        supplier_tax_id = random.choice(users)[5]
-    
-    # Track recent invoices for potential duplicate fraud patterns
-    if user_id not in recent_invoices:
-        recent_invoices[user_id] = []
-    
-    invoice_record = [invoice_id, user_id, invoice_date, total_amount, supplier_iban, supplier_name, 
-                      status, due_date, supplier_tax_id, is_fraud_invoice]
-    
-    invoices.append(invoice_record)
-    recent_invoices[user_id].append(invoice_record)
-    
-    # Introduce fraudulent duplicate invoices randomly
-    if random.random() < 0.06:
-        fraud_patterns['duplicate_invoice'] = fraud_patterns.get('duplicate_invoice', 0) + 1
-        
-        duplicate_invoice_id = len(invoices) + 1
-        
-        time_shift = random.randint(1, 72)
-        duplicate_invoice_date = (invoice_datetime + timedelta(hours=time_shift)).strftime('%Y-%m-%d %H:%M:%S')
-        
-        dup_strategy = random.randint(1, 4)
-        if dup_strategy == 1:
-            duplicate_total_amount = total_amount
-        elif dup_strategy == 2:
-            duplicate_total_amount = round(total_amount * random.uniform(0.95, 1.05), 2)
-        elif dup_strategy == 3:
-            split_factor = random.uniform(0.3, 0.7)
-            duplicate_total_amount = round(total_amount * split_factor, 2)
-            total_amount = round(total_amount * (1 - split_factor), 2)
-            invoices[-1][3] = total_amount
-        else:
-            duplicate_total_amount = round(total_amount)
-        
-        duplicate_record = [duplicate_invoice_id, user_id, duplicate_invoice_date, duplicate_total_amount, 
-                           supplier_iban, supplier_name, status, due_date, supplier_tax_id, 1]
-        
-        invoices.append(duplicate_record)
-        recent_invoices[user_id].append(duplicate_record)
-    
-    # Check for temporal patterns in recent invoices
-    if len(recent_invoices[user_id]) >= 3:
-        recent_three = recent_invoices[user_id][-3:]
-        
-        # Calculate time differences between consecutive invoices
-        date1 = datetime.strptime(recent_three[0][2], '%Y-%m-%d %H:%M:%S')
-        date2 = datetime.strptime(recent_three[1][2], '%Y-%m-%d %H:%M:%S')
-        date3 = datetime.strptime(recent_three[2][2], '%Y-%m-%d %H:%M:%S')
-        
-        time_diff1 = abs((date2 - date1).total_seconds() / 3600)  
-        time_diff2 = abs((date3 - date2).total_seconds() / 3600)  
-        
-     
-        if time_diff1 < 2 and time_diff2 < 2 and random.random() < 0.8:
-            fraud_patterns['temporal_pattern'] = fraud_patterns.get('temporal_pattern', 0) + 1
-            
-           
-            if invoices[-1][9] == 0:
-                invoices[-1][9] = 1 
-    
-    # Add a fraudulent round amount if certain conditions are met
-    if is_fraud_invoice == 0 and total_amount == round(total_amount) and random.random() < 0.4:
-        fraud_patterns['round_amount'] = fraud_patterns.get('round_amount', 0) + 1
-        invoices[-1][9] = 1 
-
-# Prepare the final output data and write to a CSV file
-output_data = []
-for invoice in invoices:
-    invoice_id, user_id, invoice_date, total_amount, supplier_iban, supplier_name, status, due_date, supplier_tax_id, is_fraud_invoice = invoice
-    
-    user = next((u for u in users if u[0] == user_id), None)
-    if user:
-        user_id, user_name, email, phone_number, registration_date, vat_number, is_fraud_user = user
-        
-        fraud_label = 1 if is_fraud_user == 1 or is_fraud_invoice == 1 else 0
-        
-        output_data.append([
-            user_id, user_name, email, phone_number, registration_date, vat_number, 
-            invoice_id, invoice_date, total_amount, supplier_iban, supplier_name, 
-            status, due_date, supplier_tax_id, fraud_label
-        ])
-
-# Write the output data to CSV
-with open('InvoicesFraud.csv', mode='w', newline='', encoding='utf-8') as file:
-    writer = csv.writer(file)
-    
-    writer.writerow([
-        'user_id', 'user_name', 'email', 'phone_number', 'registration_date', 'vat_number',
-        'invoice_id', 'invoice_date', 'total_amount', 'supplier_iban', 'supplier_name',
-        'status', 'due_date', 'supplier_tax_id', 'fraud'
+# Original generator: builds every user and invoice with Python's random module
+def generate_classic(num_users, num_invoices, output_path):
+    fraud_patterns = {} # Dictionary to track various fraud patterns
+
+    # Generate user data
+    users = []
+    for user_id in range(1, num_users + 1):
+        user_name = fake.name()
+        email = fake.unique.email()
+        is_fraud_user = 0
+
+        # Randomly introduce fraudulent patterns in email
+        if random.random() < 0.15:
+            is_fraud_user = 1
+            fraud_patterns['suspicious_email'] = fraud_patterns.get('suspicious_email', 0) + 1
+
+            # Generate suspicious email patterns for fraud users
+            email_pattern = random.choice([
+                f"{fake.first_name().lower()}{random.randint(1000, 9999)}@gmail.com",
+                f"{user_name.replace(' ', '').lower()}{random.choice(['123', '999', '007'])}@mail.com", 
+                f"{fake.word()}{fake.word()}@{random.choice(['freemail.com', 'examplemail.com', 'tempmail.net'])}",
+                f"{fake.first_name().lower()}.{random.randint(100, 999)}@{fake.domain_name()}", 
+                f"{fake.word()}.{fake.word()}{random.randint(1, 99)}@gmail.com",
+            ])
+            email = email_pattern
+
+        # Randomly introduce fraudulent phone number patterns
+        phone_number = fake.phone_number()
+        if random.random() < 0.1 and is_fraud_user == 0:
+            is_fraud_user = 1
+            fraud_patterns['invalid_phone'] = fraud_patterns.get('invalid_phone', 0) + 1
+
+            phone_pattern = random.choice([
+                "0000000000",
+                "1234567890",
+                "+00 000 000 0000", 
+                "123-456-7890",
+                "999-999-9999",
+                phone_number[:-5] + "00000" 
+            ])
+            phone_number = phone_pattern
+
+        # Generate registration date and apply suspicious pattern
+        registration_date = get_random_date().strftime('%Y-%m-%d %H:%M:%S')
+        vat_number = generate_unique_vat_id()
+
+        # Randomly introduce fraudulent registration patterns
+        if random.random() < 0.08 and is_fraud_user == 0:
+            is_fraud_user = 1
+            fraud_patterns['suspicious_registration'] = fraud_patterns.get('suspicious_registration', 0) + 1
+
+            registration_datetime = datetime.strptime(registration_date, '%Y-%m-%d %H:%M:%S')
+            suspicious_hour = random.randint(2, 4)
+            registration_datetime = registration_datetime.replace(hour=suspicious_hour, minute=random.randint(0, 59))
+            registration_date = registration_datetime.strftime('%Y-%m-%d %H:%M:%S')
+
+        # Randomly introduce suspicious VAT numbers
+        if random.random() < 0.07 and is_fraud_user == 0:
+            is_fraud_user = 1
+            fraud_patterns['suspicious_vat'] = fraud_patterns.get('suspicious_vat', 0) + 1
+
+            used_vat_numbers.discard(vat_number)
+            last_digits = random.choice(SUSPICIOUS_VAT_SUFFIXES)
+            vat_number = f"VAT{vat_number[3:-3]}{last_digits}"
+            # Re-draw the prefix while another user already has the number
+            while vat_number in used_vat_numbers:
+                vat_number = f"VAT{random.randint(100000, 999999)}{last_digits}"
+            used_vat_numbers.add(vat_number)
+
+        users.append([user_id, user_name, email, phone_number, registration_date, vat_number, is_fraud_user])
+
+    check_unique_vats([user[5] for user in users])
+
+    # Invoices are written as they are generated. The temporal-burst check only
+    # looks at a user's last three invoice dates, so that is all that is kept.
+    recent_invoices = {}
+    rows_written = 0
+    num_fraud = 0
+
+    with open(output_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+
+        # Generate a list of invoices for users
+        for i in range(num_invoices):
+            invoice_id = i + 1
+            user_id = random.randint(1, num_users)
+            invoice_date = get_random_date(2023, 2025).strftime('%Y-%m-%d %H:%M:%S')
+            total_amount = round(random.uniform(50, 5000), 2)
+            is_fraud_invoice = 0
+
+            # Randomly introduce fraudulent invoice patterns (amount)
+            if random.random() < 0.12:
+                is_fraud_invoice = 1
+                fraud_patterns['suspicious_amount'] = fraud_patterns.get('suspicious_amount', 0) + 1
+
+                amount_pattern = random.choice([
+                    round(random.uniform(9900, 10100), 2),
+                    round(random.uniform(15000, 25000), 2),
+                    round(random.uniform(1, 10), 2),
+                    round(float(random.choice([1111.11, 2222.22, 3333.33, 4444.44, 5555.55])), 2),
+                    round(random.choice([99.99, 199.99, 299.99, 399.99, 499.99]), 2)
+                ])
+                total_amount = amount_pattern
+
+            supplier_name = fake.company()
+            supplier_iban = fake.iban()
+
+            # Randomly introduce fraudulent IBAN patterns
+            if random.random() < 0.08 and is_fraud_invoice == 0:
+                is_fraud_invoice = 1
+                fraud_patterns['suspicious_iban'] = fraud_patterns.get('suspicious_iban', 0) + 1
+
+                country_code = random.choice(["XX", "YY", "ZZ", "00"])
+                check_digits = random.choice(["00", "99", "01"])
+                rest_of_iban = ''.join(random.choices("0123456789", k=20))
+                supplier_iban = f"{country_code}{check_digits}{rest_of_iban}"
+
+            status_weights = [0.7, 0.2, 0.1]
+            status = random.choices(['paid', 'pending', 'overdue'], weights=status_weights)[0]
+
+            invoice_datetime = datetime.strptime(invoice_date, '%Y-%m-%d %H:%M:%S')
+
+            # Randomly introduce date inconsistencies
+            if random.random() < 0.07 and is_fraud_invoice == 0:
+                is_fraud_invoice = 1
+                fraud_patterns['date_inconsistency'] = fraud_patterns.get('date_inconsistency', 0) + 1
+
+                days_before = random.randint(1, 60)
+                due_date = (invoice_datetime - timedelta(days=days_before)).strftime('%Y-%m-%d %H:%M:%S')
+            else:
+                days_after = random.randint(14, 60)
+                due_date = (invoice_datetime + timedelta(days=days_after)).strftime('%Y-%m-%d %H:%M:%S')
+
+            if is_fraud_invoice == 1 and random.random() < 0.5:
+                supplier_tax_id = f"VAT{random.choice(['000000000', '123456789', '999999999'])}"
+            else:
+                supplier_tax_id = random.choice(users)[5]
+
+            # Track recent invoice dates for potential duplicate fraud patterns
+            if user_id not in recent_invoices:
+                recent_invoices[user_id] = deque(maxlen=3)
+
+            # Records of this invoice (and its duplicate) until they are written
+            pending = [[invoice_id, user_id, invoice_date, total_amount, supplier_iban, supplier_name,
+                        status, due_date, supplier_tax_id, is_fraud_invoice]]
+            recent_invoices[user_id].append(invoice_datetime)
+
+            # Introduce fraudulent duplicate invoices randomly
+            if random.random() < 0.06:
+                fraud_patterns['duplicate_invoice'] = fraud_patterns.get('duplicate_invoice', 0) + 1
+
+                duplicate_invoice_id = rows_written + 2
+
+                time_shift = random.randint(1, 72)
+                duplicate_datetime = invoice_datetime + timedelta(hours=time_shift)
+                duplicate_invoice_date = duplicate_datetime.strftime('%Y-%m-%d %H:%M:%S')
+
+                dup_strategy = random.randint(1, 4)
+                if dup_strategy == 1:
+                    duplicate_total_amount = total_amount
+                elif dup_strategy == 2:
+                    duplicate_total_amount = round(total_amount * random.uniform(0.95, 1.05), 2)
+                elif dup_strategy == 3:
+                    split_factor = random.uniform(0.3, 0.7)
+                    duplicate_total_amount = round(total_amount * split_factor, 2)
+                    total_amount = round(total_amount * (1 - split_factor), 2)
+                    pending[-1][3] = total_amount
+                else:
+                    duplicate_total_amount = round(total_amount)
+
+                pending.append([duplicate_invoice_id, user_id, duplicate_invoice_date, duplicate_total_amount,
+                                supplier_iban, supplier_name, status, due_date, supplier_tax_id, 1])
+                recent_invoices[user_id].append(duplicate_datetime)
+
+            # Check for temporal patterns in recent invoices
+            if len(recent_invoices[user_id]) == 3:
+                date1, date2, date3 = recent_invoices[user_id]
+
+                # Calculate time differences between consecutive invoices
+                time_diff1 = abs((date2 - date1).total_seconds() / 3600)
+                time_diff2 = abs((date3 - date2).total_seconds() / 3600)
+
+                if time_diff1 < 2 and time_diff2 < 2 and random.random() < 0.8:
+                    fraud_patterns['temporal_pattern'] = fraud_patterns.get('temporal_pattern', 0) + 1
+                    pending[-1][9] = 1
+
+            # Add a fraudulent round amount if certain conditions are met
+            if is_fraud_invoice == 0 and total_amount == round(total_amount) and random.random() < 0.4:
+                fraud_patterns['round_amount'] = fraud_patterns.get('round_amount', 0) + 1
+                pending[-1][9] = 1
+
+            # User IDs are 1..num_users, so the user is found by position
+            _, user_name, email, phone_number, registration_date, vat_number, is_fraud_user = users[user_id - 1]
+            for invoice_id, user_id, invoice_date, total_amount, supplier_iban, supplier_name, status, due_date, supplier_tax_id, is_fraud_invoice in pending:
+                fraud_label = 1 if is_fraud_user == 1 or is_fraud_invoice == 1 else 0
+                num_fraud += fraud_label
+
+                writer.writerow([
+                    user_id, user_name, email, phone_number, registration_date, vat_number,
+                    invoice_id, invoice_date, total_amount, supplier_iban, supplier_name,
+                    status, due_date, supplier_tax_id, fraud_label
+                ])
+            rows_written += len(pending)
+
+    return rows_written, num_fraud, fraud_patterns
+
+
+# Vectorized generator: every random draw is a NumPy array operation and Faker is
+# only used to fill small pools of names, emails, phones, companies and IBANs
+
+STATUSES = np.array(['paid', 'pending', 'overdue'])
+STATUS_WEIGHTS = [0.7, 0.2, 0.1]
+FAKER_POOL_SIZE = 1000
+WRITE_CHUNK_SIZE = 100000 # Invoices generated and written per chunk
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+
+def count_pattern(fraud_patterns, pattern, count):
+    if count:
+        fraud_patterns[pattern] = fraud_patterns.get(pattern, 0) + int(count)
+
+
+# Element-wise string concatenation of arrays and scalars
+def concat(*parts):
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.char.add(result, part)
+    return result
+
+
+def digits(values, width):
+    return np.char.zfill(values.astype(str), width)
+
+
+def pick(rng, pool, size):
+    return pool[rng.integers(0, len(pool), size)]
+
+
+# Pick one of several equally long candidate arrays per row
+def choose(rng, candidates):
+    size = len(candidates[0])
+    stacked = np.array(candidates, dtype=object)
+    return stacked[rng.integers(0, len(candidates), size), np.arange(size)]
+
+
+# Precompute Faker values once; rows reference them by index
+def build_faker_pools(seed=None, size=FAKER_POOL_SIZE):
+    pool_fake = Faker()
+    if seed is not None:
+        pool_fake.seed_instance(seed)
+    emails = [pool_fake.email().split('@') for _ in range(size)]
+    return {
+        'names': np.array([pool_fake.name() for _ in range(size)]),
+        'first_names': np.array([pool_fake.first_name().lower() for _ in range(size)]),
+        'words': np.array([pool_fake.word() for _ in range(size)]),
+        'domains': np.array([pool_fake.domain_name() for _ in range(size)]),
+        'email_locals': np.array([local for local, _ in emails]),
+        'email_domains': np.array([domain for _, domain in emails]),
+        'phones': np.array([pool_fake.phone_number() for _ in range(size)]),
+        'companies': np.array([pool_fake.company() for _ in range(size)]),
+        'ibans': np.array([pool_fake.iban() for _ in range(size)]),
+    }
+
+
+# Same distribution as get_random_date, as int64 seconds since the epoch
+def random_timestamps(rng, size, start_year=2020, end_year=2025):
+    months = (rng.integers(start_year, end_year + 1, size) - 1970) * 12 + rng.integers(0, 12, size)
+    days = months.astype('datetime64[M]').astype('datetime64[D]') + rng.integers(0, 28, size)
+    seconds = rng.integers(0, 24, size) * SECONDS_PER_HOUR + rng.integers(0, 60, size) * 60 + rng.integers(0, 60, size)
+    return days.astype('datetime64[s]').astype(np.int64) + seconds
+
+
+def format_timestamps(timestamps):
+    return np.char.replace(np.datetime_as_string(timestamps.astype('datetime64[s]'), unit='s'), 'T', ' ')
+
+
+# Positions (in order) whose value equals the value just before them in order
+def later_duplicates(values, order):
+    sorted_values = values[order]
+    return order[np.r_[False, sorted_values[1:] == sorted_values[:-1]]]
+
+
+def format_vat(vat_digits):
+    return concat('VAT', digits(vat_digits, 9))
+
+
+def generate_users_vectorized(rng, pools, num_users, fraud_patterns):
+    user_ids = np.arange(1, num_users + 1, dtype=np.int64)
+    names = pick(rng, pools['names'], num_users)
+    # The user ID suffix keeps pooled emails unique
+    emails = concat(
+        pick(rng, pools['email_locals'], num_users), user_ids.astype(str), '@', pick(rng, pools['email_domains'], num_users)
+    ).astype(object)
+    is_fraud = np.zeros(num_users, dtype=np.int8)
+
+    # Suspicious email patterns
+    mask = rng.random(num_users) < 0.15
+    idx = np.flatnonzero(mask)
+    size = idx.size
+    is_fraud[idx] = 1
+    count_pattern(fraud_patterns, 'suspicious_email', size)
+    first_names = pick(rng, pools['first_names'], size)
+    first_words = pick(rng, pools['words'], size)
+    second_words = pick(rng, pools['words'], size)
+    emails[idx] = choose(rng, [
+        concat(first_names, rng.integers(1000, 10000, size).astype(str), '@gmail.com'),
+        concat(np.char.lower(np.char.replace(names[idx], ' ', '')), rng.choice(['123', '999', '007'], size), '@mail.com'),
+        concat(first_words, second_words, '@', rng.choice(['freemail.com', 'examplemail.com', 'tempmail.net'], size)),
+        concat(first_names, '.', rng.integers(100, 1000, size).astype(str), '@', pick(rng, pools['domains'], size)),
+        concat(first_words, '.', second_words, rng.integers(1, 100, size).astype(str), '@gmail.com'),
     ])
-    
-    for row in output_data:
-        writer.writerow(row)
 
-print(f"Generated {num_users} users and {len(invoices)} invoices")
-print(f"Total fraudulent entries: {sum(1 for row in output_data if row[14] == 1)}")
-print("\nFraud pattern distribution (internal reference only):")
-for pattern, count in fraud_patterns.items():
-    print(f"- {pattern}: {count} instances")
+    # Invalid phone number patterns
+    phones = pick(rng, pools['phones'], num_users).astype(object)
+    mask = (rng.random(num_users) < 0.1) & (is_fraud == 0)
+    idx = np.flatnonzero(mask)
+    size = idx.size
+    is_fraud[idx] = 1
+    count_pattern(fraud_patterns, 'invalid_phone', size)
+    phones[idx] = choose(rng, [
+        np.full(size, "0000000000"),
+        np.full(size, "1234567890"),
+        np.full(size, "+00 000 000 0000"),
+        np.full(size, "123-456-7890"),
+        np.full(size, "999-999-9999"),
+        np.array([phone[:-5] + "00000" for phone in phones[idx]], dtype=object),
+    ])
+
+    # Registrations between 2 and 4 AM
+    registration = random_timestamps(rng, num_users)
+    mask = (rng.random(num_users) < 0.08) & (is_fraud == 0)
+    idx = np.flatnonzero(mask)
+    size = idx.size
+    is_fraud[idx] = 1
+    count_pattern(fraud_patterns, 'suspicious_registration', size)
+    day_start = registration[idx] - registration[idx] % SECONDS_PER_DAY
+    registration[idx] = (day_start + rng.integers(2, 5, size) * SECONDS_PER_HOUR
+                         + rng.integers(0, 60, size) * 60 + registration[idx] % 60)
+
+    # Unique VAT numbers, some ending with a suspicious pattern
+    vat = rng.choice(900000000, size=num_users, replace=False) + 100000000
+    mask = (rng.random(num_users) < 0.07) & (is_fraud == 0)
+    idx = np.flatnonzero(mask)
+    size = idx.size
+    is_fraud[idx] = 1
+    count_pattern(fraud_patterns, 'suspicious_vat', size)
+    vat[idx] = vat[idx] // 1000 * 1000 + rng.choice([int(suffix) for suffix in SUSPICIOUS_VAT_SUFFIXES], size)
+    # Re-draw the prefix of suspicious numbers that another user already has.
+    # Sorting suspicious numbers after the others makes them the repeats.
+    suspicious = np.zeros(num_users, dtype=bool)
+    suspicious[idx] = True
+    while True:
+        repeats = later_duplicates(vat, np.lexsort((suspicious, vat)))
+        if repeats.size == 0:
+            break
+        vat[repeats] = rng.integers(100000, 1000000, repeats.size) * 1000 + vat[repeats] % 1000
+    check_unique_vats(vat.tolist())
+
+    return {
+        'user_id': user_ids,
+        'user_name': names,
+        'email': emails,
+        'phone_number': phones,
+        'registration_date': format_timestamps(registration),
+        'vat': vat,
+        'vat_number': format_vat(vat),
+        'is_fraud': is_fraud,
+    }
+
+
+# Last two invoice timestamps per user, so the temporal-burst check can look
+# at the previous invoices of a user across successive chunks
+def new_burst_window(num_users):
+    return {
+        'timestamps': np.zeros((num_users, 2), dtype=np.int64),
+        'counts': np.zeros(num_users, dtype=np.int64),
+    }
+
+
+# Invoices uploaded by `users`; suppliers are drawn from supplier_vats, by
+# default the VAT numbers of the same users
+def generate_invoices_vectorized(rng, pools, users, num_invoices, first_invoice_id, fraud_patterns, window=None,
+                                 supplier_vats=None):
+    num_users = len(users['user_id'])
+    window = window if window is not None else new_burst_window(num_users)
+    supplier_vats = supplier_vats if supplier_vats is not None else users['vat']
+    size = num_invoices
+
+    user_idx = rng.integers(0, num_users, size)
+    invoice_ts = random_timestamps(rng, size, 2023, 2025)
+    amount = np.round(rng.uniform(50, 5000, size), 2)
+    fraud = np.zeros(size, dtype=np.int8)
+
+    # Suspicious amounts
+    idx = np.flatnonzero(rng.random(size) < 0.12)
+    fraud[idx] = 1
+    count_pattern(fraud_patterns, 'suspicious_amount', idx.size)
+    amount[idx] = choose(rng, [
+        np.round(rng.uniform(9900, 10100, idx.size), 2),
+        np.round(rng.uniform(15000, 25000, idx.size), 2),
+        np.round(rng.uniform(1, 10, idx.size), 2),
+        rng.choice([1111.11, 2222.22, 3333.33, 4444.44, 5555.55], idx.size),
+        rng.choice([99.99, 199.99, 299.99, 399.99, 499.99], idx.size),
+    ]).astype(np.float64)
+
+    company_idx = rng.integers(0, len(pools['companies']), size)
+    iban = pick(rng, pools['ibans'], size).astype(object)
+
+    # Invalid IBAN formats
+    idx = np.flatnonzero((rng.random(size) < 0.08) & (fraud == 0))
+    fraud[idx] = 1
+    count_pattern(fraud_patterns, 'suspicious_iban', idx.size)
+    iban[idx] = concat(
+        rng.choice(["XX", "YY", "ZZ", "00"], idx.size),
+        rng.choice(["00", "99", "01"], idx.size),
+        digits(rng.integers(0, 10 ** 10, idx.size), 10),
+        digits(rng.integers(0, 10 ** 10, idx.size), 10),
+    )
+
+    status = rng.choice(len(STATUSES), size, p=STATUS_WEIGHTS)
+
+    # Due dates before the invoice date
+    due_ts = invoice_ts + rng.integers(14, 61, size) * SECONDS_PER_DAY
+    idx = np.flatnonzero((rng.random(size) < 0.07) & (fraud == 0))
+    fraud[idx] = 1
+    count_pattern(fraud_patterns, 'date_inconsistency', idx.size)
+    due_ts[idx] = invoice_ts[idx] - rng.integers(1, 61, idx.size) * SECONDS_PER_DAY
+
+    # Supplier VAT of another user, or an invalid one for half of the fraudulent invoices
+    supplier_vat = supplier_vats[rng.integers(0, len(supplier_vats), size)]
+    idx = np.flatnonzero((fraud == 1) & (rng.random(size) < 0.5))
+    supplier_vat[idx] = rng.choice([0, 123456789, 999999999], idx.size)
+
+    invoice_fraud = fraud.copy()
+
+    # Duplicates, inserted right after their original invoice
+    is_duplicated = rng.random(size) < 0.06
+    dup = np.flatnonzero(is_duplicated)
+    count_pattern(fraud_patterns, 'duplicate_invoice', dup.size)
+    dup_ts = invoice_ts[dup] + rng.integers(1, 73, dup.size) * SECONDS_PER_HOUR
+    strategy = rng.integers(1, 5, dup.size)
+    dup_amount = amount[dup].copy()
+    mask = strategy == 2
+    dup_amount[mask] = np.round(amount[dup[mask]] * rng.uniform(0.95, 1.05, mask.sum()), 2)
+    mask = strategy == 3
+    split_factor = rng.uniform(0.3, 0.7, mask.sum())
+    dup_amount[mask] = np.round(amount[dup[mask]] * split_factor, 2)
+    amount[dup[mask]] = np.round(amount[dup[mask]] * (1 - split_factor), 2)
+    mask = strategy == 4
+    dup_amount[mask] = np.round(amount[dup[mask]])
+
+    total = size + dup.size
+    original_pos = np.arange(size) + np.cumsum(is_duplicated) - is_duplicated
+    dup_pos = original_pos[dup] + 1
+
+    def interleave(original, duplicate):
+        out = np.empty(total, dtype=original.dtype)
+        out[original_pos] = original
+        out[dup_pos] = duplicate
+        return out
+
+    invoices = {
+        'invoice_id': np.arange(first_invoice_id, first_invoice_id + total, dtype=np.int64),
+        'user_idx': interleave(user_idx, user_idx[dup]),
+        'invoice_ts': interleave(invoice_ts, dup_ts),
+        'total_amount': interleave(amount, dup_amount),
+        'supplier_iban': interleave(iban, iban[dup]),
+        'company_idx': interleave(company_idx, company_idx[dup]),
+        'status': interleave(status, status[dup]),
+        'due_ts': interleave(due_ts, due_ts[dup]),
+        'supplier_vat': interleave(supplier_vat, supplier_vat[dup]),
+        'fraud': interleave(fraud, np.ones(dup.size, dtype=np.int8)),
+    }
+
+    # The burst and round-amount checks run once per generated invoice, on the
+    # last record written for it (the duplicate when there is one)
+    checked_pos = original_pos + is_duplicated
+    is_checked = np.zeros(total, dtype=bool)
+    is_checked[checked_pos] = True
+    apply_burst_check(rng, invoices, is_checked, window, fraud_patterns)
+
+    idx = np.flatnonzero((invoice_fraud == 0) & (amount == np.round(amount)) & (rng.random(size) < 0.4))
+    count_pattern(fraud_patterns, 'round_amount', idx.size)
+    invoices['fraud'][checked_pos[idx]] = 1
+
+    return invoices
+
+
+# Flag invoices that are the third of a user's invoices within two-hour gaps,
+# comparing each checked record with the user's two previous records
+def apply_burst_check(rng, invoices, is_checked, window, fraud_patterns):
+    users = invoices['user_idx']
+    total = len(users)
+    if total == 0:
+        return
+
+    order = np.lexsort((np.arange(total), users))
+    sorted_users = users[order]
+    sorted_ts = invoices['invoice_ts'][order]
+    positions = np.arange(total)
+    group_start = np.r_[True, sorted_users[1:] != sorted_users[:-1]]
+    rank = positions - np.maximum.accumulate(np.where(group_start, positions, 0))
+
+    previous_window = window['timestamps'][sorted_users]
+    prev1 = np.where(rank >= 1, np.roll(sorted_ts, 1), previous_window[:, 0])
+    prev2 = np.where(rank >= 2, np.roll(sorted_ts, 2), np.where(rank == 1, previous_window[:, 0], previous_window[:, 1]))
+    has_history = window['counts'][sorted_users] + rank >= 2
+    burst = (
+        has_history
+        & (np.abs(prev1 - prev2) < 2 * SECONDS_PER_HOUR)
+        & (np.abs(sorted_ts - prev1) < 2 * SECONDS_PER_HOUR)
+        & is_checked[order]
+        & (rng.random(total) < 0.8)
+    )
+    count_pattern(fraud_patterns, 'temporal_pattern', burst.sum())
+    invoices['fraud'][order[burst]] = 1
+
+    # Keep only the last two timestamps of every user seen in this chunk
+    group_end = np.flatnonzero(np.r_[sorted_users[1:] != sorted_users[:-1], True])
+    chunk_users = sorted_users[group_end]
+    group_size = rank[group_end] + 1
+    second_latest = np.where(group_size >= 2, sorted_ts[group_end - 1], window['timestamps'][chunk_users, 0])
+    window['timestamps'][chunk_users, 0] = sorted_ts[group_end]
+    window['timestamps'][chunk_users, 1] = second_latest
+    window['counts'][chunk_users] = np.minimum(2, window['counts'][chunk_users] + group_size)
+
+
+# Fill in the text columns for a slice of invoices and write them
+def write_vectorized_rows(writer, pools, users, invoices, start, stop):
+    user_idx = invoices['user_idx'][start:stop]
+    columns = [
+        users['user_id'][user_idx],
+        users['user_name'][user_idx],
+        users['email'][user_idx],
+        users['phone_number'][user_idx],
+        users['registration_date'][user_idx],
+        users['vat_number'][user_idx],
+        invoices['invoice_id'][start:stop],
+        format_timestamps(invoices['invoice_ts'][start:stop]),
+        invoices['total_amount'][start:stop],
+        invoices['supplier_iban'][start:stop],
+        pools['companies'][invoices['company_idx'][start:stop]],
+        STATUSES[invoices['status'][start:stop]],
+        format_timestamps(invoices['due_ts'][start:stop]),
+        format_vat(invoices['supplier_vat'][start:stop]),
+        np.maximum(users['is_fraud'][user_idx], invoices['fraud'][start:stop]),
+    ]
+    writer.writerows(zip(*(column.tolist() for column in columns)))
+
+
+def fraud_labels(users, invoices):
+    return np.maximum(users['is_fraud'][invoices['user_idx']], invoices['fraud'])
+
+
+# Generate invoices of the given users chunk by chunk, writing each chunk
+# before the next one is drawn. Only the users and the per-user burst window
+# are kept between chunks, so memory does not grow with the number of invoices.
+def write_vectorized_invoices(output_path, rng, pools, users, num_invoices, fraud_patterns, supplier_vats=None,
+                              header=True):
+    window = new_burst_window(len(users['user_id']))
+    rows = 0
+    num_fraud = 0
+
+    with open(output_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        if header:
+            writer.writerow(CSV_HEADER)
+        for start in range(0, num_invoices, WRITE_CHUNK_SIZE):
+            chunk_size = min(WRITE_CHUNK_SIZE, num_invoices - start)
+            invoices = generate_invoices_vectorized(rng, pools, users, chunk_size, rows + 1, fraud_patterns, window,
+                                                    supplier_vats)
+            total = len(invoices['invoice_id'])
+            write_vectorized_rows(writer, pools, users, invoices, 0, total)
+            num_fraud += int(fraud_labels(users, invoices).sum())
+            rows += total
+
+    return rows, num_fraud
+
+
+def generate_vectorized(num_users, num_invoices, output_path, seed=None):
+    rng = np.random.default_rng(seed)
+    pools = build_faker_pools(seed)
+    fraud_patterns = {}
+    users = generate_users_vectorized(rng, pools, num_users, fraud_patterns)
+    num_rows, num_fraud = write_vectorized_invoices(output_path, rng, pools, users, num_invoices, fraud_patterns)
+    return num_rows, num_fraud, fraud_patterns
+
+
+# Split count into parts that differ by at most one
+def split_evenly(count, parts):
+    base, extra = divmod(count, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+# Rows start..stop of every user column
+def slice_users(users, start, stop):
+    return {column: values[start:stop] for column, values in users.items()}
+
+
+# Runs in a worker process: the invoices uploaded by one shard of the users,
+# with its own seed and shard-local invoice IDs, written without header next
+# to the final output. Suppliers are drawn from the VAT numbers of all users.
+def generate_shard(task):
+    shard_path, seed_sequence, users, supplier_vats, num_invoices = task
+    rng = np.random.default_rng(seed_sequence)
+    pools = build_faker_pools(int(seed_sequence.generate_state(1)[0]))
+    fraud_patterns = {}
+    rows, num_fraud = write_vectorized_invoices(shard_path, rng, pools, users, num_invoices, fraud_patterns,
+                                                supplier_vats, header=False)
+    return {'path': shard_path, 'rows': rows, 'fraud': num_fraud, 'fraud_patterns': fraud_patterns}
+
+
+# Concatenate shard files in order, shifting invoice IDs to be globally sequential
+def merge_shards(shards, output_path):
+    invoice_offset = 0
+
+    with open(output_path, mode='w', newline='', encoding='utf-8') as output:
+        writer = csv.writer(output)
+        writer.writerow(CSV_HEADER)
+
+        for shard in shards:
+            with open(shard['path'], mode='r', newline='', encoding='utf-8') as file:
+                for row in csv.reader(file):
+                    row[6] = str(int(row[6]) + invoice_offset)
+                    writer.writerow(row)
+
+            invoice_offset += shard['rows']
+            os.remove(shard['path'])
+
+    return invoice_offset
+
+
+# Generate the dataset in `workers` processes. Users are drawn once, exactly as
+# generate_vectorized draws them, so a user's details and VAT number depend only
+# on the seed and the user ID. Invoices are split into shards by uploader, each
+# with a seed derived from `seed`, and may name any user as supplier, so the
+# payment graph is one network whatever the worker count. The same seed and
+# worker count give byte-identical output.
+def generate_sharded(num_users, num_invoices, output_path, seed=None, workers=2):
+    fraud_patterns = {}
+    users = generate_users_vectorized(np.random.default_rng(seed), build_faker_pools(seed), num_users, fraud_patterns)
+    seed_sequences = np.random.SeedSequence(seed).spawn(workers)
+    user_bounds = np.cumsum([0] + split_evenly(num_users, workers)).tolist()
+    invoice_counts = split_evenly(num_invoices, workers)
+
+    tasks = [
+        (f"{output_path}.shard{index}", seed_sequences[index],
+         slice_users(users, user_bounds[index], user_bounds[index + 1]), users['vat'], invoice_counts[index])
+        for index in range(workers)
+    ]
+    with multiprocessing.Pool(workers) as pool:
+        shards = pool.map(generate_shard, tasks)
+
+    num_rows = merge_shards(shards, output_path)
+
+    for shard in shards:
+        for pattern, count in shard['fraud_patterns'].items():
+            count_pattern(fraud_patterns, pattern, count)
+    return num_rows, sum(shard['fraud'] for shard in shards), fraud_patterns
+
+
+def print_summary(num_users, num_rows, num_fraud, fraud_patterns, output_path):
+    print(f"Generated {num_users} users and {num_rows} invoices")
+    print(f"Total fraudulent entries: {num_fraud}")
+    print("\nFraud pattern distribution (internal reference only):")
+    for pattern, count in fraud_patterns.items():
+        print(f"- {pattern}: {count} instances")
+
+    print(f"\nCSV file '{output_path}' created successfully")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic invoices with fraud patterns")
+    parser.add_argument('--mode', choices=['classic', 'vectorized'], default='classic',
+                        help="'vectorized' uses NumPy arrays and scales to tens of millions of invoices")
+    parser.add_argument('--users', type=int, default=num_users, help="Number of users to generate")
+    parser.add_argument('--invoices', type=int, default=num_invoices, help="Number of invoices to generate")
+    parser.add_argument('--seed', type=int, help="Seed for reproducible output")
+    parser.add_argument('--output', default='InvoicesFraud.csv')
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Generate the vectorized dataset in N processes (shards are merged into --output)")
+    args = parser.parse_args()
+
+    if args.workers < 1 or args.workers > args.users:
+        parser.error("--workers must be between 1 and the number of users")
+    if args.workers > 1 and args.mode != 'vectorized':
+        parser.error("--workers requires --mode vectorized")
+
+    if args.workers > 1:
+        num_rows, num_fraud, fraud_patterns = generate_sharded(args.users, args.invoices, args.output, args.seed, args.workers)
+    elif args.mode == 'vectorized':
+        num_rows, num_fraud, fraud_patterns = generate_vectorized(args.users, args.invoices, args.output, args.seed)
+    else:
+        if args.seed is not None:
+            random.seed(args.seed)
+            fake.seed_instance(args.seed)
+        num_rows, num_fraud, fraud_patterns = generate_classic(args.users, args.invoices, args.output)
 
-print("\nCSV file 'EnhancedInvoiceFraud.csv' created successfully")
\ No newline at end of file
+    print_summary(args.users, num_rows, num_fraud, fraud_patterns, args.output)
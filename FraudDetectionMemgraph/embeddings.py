@@ -0,0 +1,116 @@
+import argparse
+import time
+import logging
+from functools import lru_cache
+from queryMetrics import name_query
+
+logger = logging.getLogger(__name__)
+
+# node2vec parameters shared by the full and the incremental runs, in the
+# positional order expected by node2vec.set_embeddings / get_embeddings
+NODE2VEC_PARAMS = [
+    ('is_directed', False),
+    ('p', 1.0),
+    ('q', 1.0),
+    ('num_walks', 5),
+    ('walk_length', 20),
+    ('vector_size', 64),
+    ('alpha', 0.025),
+    ('window', 5),
+    ('min_count', 1),
+    ('seed', 1),
+    ('workers', 4),
+    ('min_alpha', 0.0001),
+    ('sg', 1),
+    ('hs', 0),
+    ('negative', 5),
+    ('epochs', 5),
+    ('edge_weight_property', "weight"),
+]
+
+# Size of the neighbourhood around new nodes used for incremental walks
+DEFAULT_HOPS = 2
+
+_ARGUMENTS = ', '.join(f"${name}" for name, _ in NODE2VEC_PARAMS)
+
+FULL_QUERY = name_query('full_embeddings', f"""
+CALL node2vec.set_embeddings({_ARGUMENTS})
+YIELD *;
+""")
+
+# Walks run on the projection of the uploaded invoices' k-hop neighbourhood,
+# found from $ids through the invoiceID index (no scan of the whole graph).
+# BFS keeps one path per reachable node, so a user with many invoices does not
+# multiply the paths. get_embeddings returns parallel lists of nodes and
+# embeddings; only nodes without an embedding are written.
+INCREMENTAL_TEMPLATE = """
+UNWIND $ids AS invoice_id
+MATCH (i:Invoice {{invoiceID: invoice_id}})
+MATCH path = (i)-[*BFS ..{hops}]-()
+WITH project(path) AS subgraph
+CALL node2vec.get_embeddings(subgraph, {arguments})
+YIELD nodes, embeddings
+UNWIND range(0, size(nodes) - 1) AS index
+WITH nodes[index] AS node, embeddings[index] AS embedding
+WHERE node.embedding IS NULL
+SET node.embedding = embedding
+RETURN count(node) AS updated;
+"""
+
+
+# Incremental query for a neighbourhood size, registered under one query name
+@lru_cache(maxsize=None)
+def incremental_query(hops=DEFAULT_HOPS):
+    return name_query('incremental_embeddings', INCREMENTAL_TEMPLATE.format(hops=int(hops), arguments=_ARGUMENTS))
+
+
+def node2vec_parameters():
+    return dict(NODE2VEC_PARAMS)
+
+
+# Recompute embeddings for the whole graph; cost grows with the graph size,
+# so run it as an explicit or scheduled operation
+def set_full_embeddings(memgraph):
+    start = time.perf_counter()
+    memgraph.execute(FULL_QUERY, node2vec_parameters())
+    logger.info(f"Full node2vec recompute took {time.perf_counter() - start:.2f}s")
+
+
+# Compute embeddings for the given uploaded invoices and their new users, using
+# walks over their k-hop neighbourhood. The Word2Vec model behind these vectors
+# is trained on that subgraph only, so they are not in the same vector space as
+# the embeddings of the last full run, which the node classifier was trained on:
+# predictions for these invoices are approximate until the next full recompute.
+def set_incremental_embeddings(memgraph, invoice_ids, hops=DEFAULT_HOPS):
+    ids = list(invoice_ids)
+    if not ids:
+        return 0
+    query = incremental_query(int(hops))
+    start = time.perf_counter()
+    result = next(memgraph.execute_and_fetch(query, dict(node2vec_parameters(), ids=ids)), {})
+    updated = result.get('updated', 0)
+    logger.info(f"Incremental node2vec: {updated} new embeddings in {time.perf_counter() - start:.2f}s")
+    return updated
+
+
+if __name__ == '__main__':
+    import csv
+    from bulkLoader import to_int
+    from memgraphBackend import memgraph_factory
+
+    parser = argparse.ArgumentParser(description="Recompute node2vec embeddings (e.g. from cron)")
+    parser.add_argument('--incremental', metavar='CSV', help="Only embed the invoices of this uploaded CSV and their users")
+    parser.add_argument('--hops', type=int, default=DEFAULT_HOPS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    connect = memgraph_factory()
+    memgraph = connect()
+    if args.incremental:
+        with open(args.incremental, mode='r', newline='', encoding='utf-8') as file:
+            invoice_ids = [to_int(row['invoice_id']) for row in csv.DictReader(file)]
+        set_incremental_embeddings(memgraph, invoice_ids, args.hops)
+    else:
+        set_full_embeddings(memgraph)
+    if connect.recorder:
+        connect.recorder.log()
@@ -0,0 +1,32 @@
+import time
+import logging
+from bulkLoader import batched
+from queryMetrics import name_query
+
+logger = logging.getLogger(__name__)
+
+# Number of invoices classified by a single predict query
+DEFAULT_PREDICTION_BATCH_SIZE = 1000
+
+# One parameterized query per chunk so Memgraph can reuse the plan. Invoices
+# uploaded without a label are stored with fraud = -1; labelled ones are skipped
+PREDICT_QUERY = name_query('predict', """
+UNWIND $ids AS invoice_id
+MATCH (n:Invoice {invoiceID: invoice_id})
+WHERE n.fraud = -1
+CALL node_classification.predict(n)
+YIELD predicted_class
+SET n.fraud = predicted_class
+RETURN n.invoiceID AS invoiceID, predicted_class;
+""")
+
+
+# Classify the given invoices that are still unlabeled, chunk by chunk, storing the prediction in i.fraud,
+# and yield {'invoiceID', 'predicted_class'} rows as each chunk completes
+def predict_invoices(memgraph, invoice_ids, batch_size=DEFAULT_PREDICTION_BATCH_SIZE):
+    for chunk_number, chunk in enumerate(batched(invoice_ids, batch_size), start=1):
+        start = time.perf_counter()
+        results = list(memgraph.execute_and_fetch(PREDICT_QUERY, {'ids': chunk}))
+        elapsed = time.perf_counter() - start
+        logger.info(f"Prediction chunk {chunk_number}: {len(chunk)} invoices in {elapsed * 1000:.1f} ms")
+        yield from results
@@ -0,0 +1,113 @@
+import argparse
+import time
+import logging
+from queryMetrics import name_query, name_query_prefix
+
+logger = logging.getLogger(__name__)
+
+# Nodes or relationships deleted per transaction; bounds the delta Memgraph
+# keeps in memory until the commit
+DEFAULT_CLEAR_BATCH_SIZE = 10000
+
+COUNT_NODES_QUERY = name_query('count_nodes', "MATCH (n) RETURN count(n) AS count;")
+COUNT_RELATIONSHIPS_QUERY = name_query('count_relationships', "MATCH ()-[r]->() RETURN count(r) AS count;")
+
+# Relationships go first, so that deleting a high-degree node (a user with many
+# invoices) does not pull all of its relationships into a single transaction
+DELETE_RELATIONSHIPS_QUERY = name_query('clear_relationships', """
+MATCH ()-[r]->()
+WITH r LIMIT $batch_size
+DELETE r
+RETURN count(*) AS deleted;
+""")
+
+DELETE_NODES_QUERY = name_query('clear_nodes', """
+MATCH (n)
+WITH n LIMIT $batch_size
+DETACH DELETE n
+RETURN count(*) AS deleted;
+""")
+
+# (stage, count query, delete query) in the order they run
+CLEAR_STAGES = [
+    ('relationships', COUNT_RELATIONSHIPS_QUERY, DELETE_RELATIONSHIPS_QUERY),
+    ('nodes', COUNT_NODES_QUERY, DELETE_NODES_QUERY),
+]
+
+STORAGE_INFO_QUERY = name_query('storage_info', "SHOW STORAGE INFO;")
+DROP_GRAPH_QUERY = name_query('drop_graph', "DROP GRAPH;")
+name_query_prefix('storage_mode', 'STORAGE MODE')
+ANALYTICAL = 'IN_MEMORY_ANALYTICAL'
+TRANSACTIONAL = 'IN_MEMORY_TRANSACTIONAL'
+
+
+def count(memgraph, query):
+    return next(memgraph.execute_and_fetch(query), {}).get('count', 0) or 0
+
+
+# Run a delete query until nothing is left, yielding the number deleted by each batch
+def delete_in_batches(memgraph, query, batch_size=DEFAULT_CLEAR_BATCH_SIZE):
+    while True:
+        deleted = next(memgraph.execute_and_fetch(query, {'batch_size': batch_size}), {}).get('deleted', 0) or 0
+        if not deleted:
+            return
+        yield deleted
+
+
+# Delete the whole graph in bounded transactions. progress(stage, deleted, total)
+# is called after every batch. Indexes, constraints and the model stay in place.
+def clear_graph(memgraph, batch_size=DEFAULT_CLEAR_BATCH_SIZE, progress=None):
+    deleted = {}
+    for stage, count_query, delete_query in CLEAR_STAGES:
+        total = count(memgraph, count_query)
+        deleted[stage] = 0
+        start = time.perf_counter()
+        for batch in delete_in_batches(memgraph, delete_query, batch_size):
+            deleted[stage] += batch
+            if progress:
+                progress(stage, deleted[stage], total)
+        logger.info(f"Deleted {deleted[stage]} {stage} in {time.perf_counter() - start:.2f}s")
+    return deleted
+
+
+def get_storage_mode(memgraph):
+    for row in memgraph.execute_and_fetch(STORAGE_INFO_QUERY):
+        values = list(row.values())
+        if len(values) == 2 and values[0] == 'storage_mode':
+            return values[1]
+    return None
+
+
+# Fast wipe: DROP GRAPH frees everything at once but needs the analytical storage
+# mode and removes indexes and constraints too, so callers re-apply the schema
+# afterwards. No other transaction may be open while the storage mode changes.
+def drop_graph(memgraph):
+    mode = get_storage_mode(memgraph) or TRANSACTIONAL
+    start = time.perf_counter()
+    if mode != ANALYTICAL:
+        memgraph.execute(f"STORAGE MODE {ANALYTICAL};")
+    try:
+        memgraph.execute(DROP_GRAPH_QUERY)
+    finally:
+        if mode != ANALYTICAL:
+            memgraph.execute(f"STORAGE MODE {mode};")
+    logger.info(f"Dropped the graph in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    from memgraphBackend import memgraph_factory
+    from memgraphSchema import ensure_schema
+
+    parser = argparse.ArgumentParser(description="Delete every node and relationship in Memgraph")
+    parser.add_argument('--reset', action='store_true', help="DROP GRAPH and re-create the schema instead of batched deletes")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_CLEAR_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    memgraph = memgraph_factory()()
+    if args.reset:
+        drop_graph(memgraph)
+        ensure_schema(memgraph)
+    else:
+        clear_graph(memgraph, args.batch_size,
+                    lambda stage, deleted, total: logger.info(f"{stage}: {deleted}/{total}"))
@@ -0,0 +1,157 @@
+import os
+import json
+import logging
+import threading
+from queryMetrics import name_query
+
+try:
+    import fcntl
+except ImportError:  # not on POSIX: only threads of one process are serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# IDs reserved per write of the sequence file
+DEFAULT_BLOCK_SIZE = 1000
+
+MAX_INVOICE_ID_QUERY = name_query('max_invoice_id', "MATCH (i:Invoice) RETURN MAX(i.invoiceID) AS max_invoice_id")
+
+INVOICE_ID_RANGE_QUERY = name_query('invoice_id_range', """
+MATCH (i:Invoice) WHERE i.invoiceID >= $first AND i.invoiceID < $end
+RETURN count(i) AS taken
+""")
+
+# VAT numbers are VAT + 9 digits. Serial n maps to (A * n + B) mod N, a
+# permutation of the 900,000,000 possible numbers (A is coprime with N), so
+# numbers look random but never repeat and nothing needs to be remembered.
+VAT_OFFSET = 100000000
+VAT_SPACE = 900000000
+VAT_MULTIPLIER = 594823321
+VAT_INCREMENT = 271828183
+
+
+# First ID above every invoice already in the graph (one label scan)
+def invoice_id_floor(memgraph):
+    max_id = next(memgraph.execute_and_fetch(MAX_INVOICE_ID_QUERY), {}).get('max_invoice_id')
+    return (max_id or 0) + 1
+
+
+# Where a block of invoice IDs [first, end) may start: first when no invoice
+# uses an ID in the range (a range scan of the invoiceID index), otherwise
+# above every invoice in the graph, e.g. after memgraphLoad.py reloaded 1..N
+def invoice_block_start(memgraph, first, end):
+    row = next(memgraph.execute_and_fetch(INVOICE_ID_RANGE_QUERY, {'first': first, 'end': end}), {})
+    return invoice_id_floor(memgraph) if row.get('taken') else first
+
+
+# High-water marks of the named sequences, kept in a JSON file next to the
+# graph rather than in it, so that node2vec, training and /clear never see
+# them and a cleared graph does not restart the VAT sequence. Reservations
+# hold an exclusive lock on <path>.lock, so dashboard processes sharing the
+# file (same host or shared volume) never get the same block.
+class SequenceFile:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    # Reserve block_size values of a sequence and return the first one; start()
+    # gives the first value of a sequence that does not exist yet
+    def reserve(self, name, block_size, start=None):
+        with self._lock, open(self.path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            marks = self._read()
+            if name not in marks:
+                marks[name] = start() if start else 1
+            first = marks[name]
+            marks[name] = first + block_size
+            self._write(marks)
+        return first
+
+    # Move a sequence up to value (never down), e.g. past IDs found in use
+    def advance(self, name, value):
+        with self._lock, open(self.path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            marks = self._read()
+            marks[name] = max(marks.get(name, value), value)
+            self._write(marks)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    # Write a temporary file and rename it, so a crash never leaves half a file
+    def _write(self, marks):
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(marks, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+
+# Hands out unique, increasing IDs from blocks reserved in a SequenceFile;
+# start(), if given, is called once, when the sequence is first created.
+# check(first, end), if given, returns where a reserved block may start: a
+# higher value means the IDs are in use, so the sequence skips ahead to it.
+class BlockAllocator:
+    def __init__(self, sequences, name, block_size=DEFAULT_BLOCK_SIZE, start=None, check=None):
+        self.sequences = sequences
+        self.name = name
+        self.block_size = block_size
+        self.start = start
+        self.check = check
+        self._next = 0
+        self._end = 0
+        self._blocks = 0
+        self._lock = threading.Lock()
+
+    def allocate(self, count=1):
+        ids = []
+        with self._lock:
+            while len(ids) < count:
+                if self._next >= self._end:
+                    self._next = self._reserve()
+                    self._end = self._next + self.block_size
+                take = min(count - len(ids), self._end - self._next)
+                ids.extend(range(self._next, self._next + take))
+                self._next += take
+        return ids
+
+    def next(self):
+        return self.allocate(1)[0]
+
+    def metrics(self):
+        with self._lock:
+            return {'blocks_reserved': self._blocks, 'remaining_in_block': self._end - self._next}
+
+    def _reserve(self):
+        while True:
+            first = self.sequences.reserve(self.name, self.block_size, self.start)
+            self._blocks += 1
+            floor = self.check(first, first + self.block_size) if self.check else first
+            if floor <= first:
+                break
+            logger.warning(f"{self.name} IDs {first}-{first + self.block_size - 1} are in use, skipping to {floor}")
+            self.sequences.advance(self.name, floor)
+        logger.info(f"Reserved {self.name} IDs {first}-{first + self.block_size - 1}")
+        return first
+
+
+def vat_number(serial):
+    return f"VAT{VAT_OFFSET + (VAT_MULTIPLIER * serial + VAT_INCREMENT) % VAT_SPACE}"
+
+
+# Unique VAT numbers from a BlockAllocator serial
+class VatNumbers:
+    def __init__(self, allocator):
+        self.allocator = allocator
+
+    def next(self):
+        return vat_number(self.allocator.next() % VAT_SPACE)
+
+    def allocate(self, count):
+        return [vat_number(serial % VAT_SPACE) for serial in self.allocator.allocate(count)]
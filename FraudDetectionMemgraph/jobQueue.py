@@ -0,0 +1,144 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+# State of one background job, updated by the worker and read by the status endpoint
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.stage = None
+        self.rows_processed = 0
+        self.stages = OrderedDict()
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in (COMPLETED, FAILED)
+
+    # Time a pipeline stage and expose it as the current stage while it runs;
+    # extra fields (e.g. the expected total) are reported with the stage
+    @contextmanager
+    def run_stage(self, name, **extra):
+        record = dict({'rows': 0, 'seconds': None}, **extra)
+        with self._lock:
+            self.stage = name
+            self.stages[name] = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            with self._lock:
+                record['seconds'] = round(time.perf_counter() - start, 3)
+
+    # Count rows towards the job total and the stage that is currently running
+    def add_rows(self, count):
+        with self._lock:
+            self.rows_processed += count
+            if self.stage in self.stages:
+                self.stages[self.stage]['rows'] += count
+
+    def to_dict(self, include_result=True):
+        with self._lock:
+            data = {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'stage': self.stage,
+                'rows_processed': self.rows_processed,
+                'stages': {name: dict(record) for name, record in self.stages.items()},
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+            if include_result:
+                data['result'] = self.result
+            return data
+
+
+# Keeps every queued/running job plus at most max_finished finished jobs,
+# evicting the oldest finished ones first
+class JobStore:
+    def __init__(self, max_finished=100):
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def finished(self, job):
+        with self._lock:
+            # Move to the end so eviction follows completion order
+            if job.id in self._jobs:
+                self._jobs.move_to_end(job.id)
+            self._evict()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+# Runs job functions on a thread pool; each function is called as fn(job, *args)
+# and its return value becomes job.result
+class JobQueue:
+    def __init__(self, max_workers=1, max_finished=100):
+        self.store = JobStore(max_finished)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+
+    def submit(self, kind, fn, *args, **kwargs):
+        job = Job(kind)
+        self.store.add(job)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = COMPLETED
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.kind}) failed")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.stage = None
+            job.finished_at = time.time()
+            self.store.finished(job)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
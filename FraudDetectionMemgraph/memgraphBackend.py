@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict, deque
+from queryMetrics import count_rows, normalize_query, query_name
+
+logger = logging.getLogger(__name__)
+
+# MEMGRAPH_BACKEND selects what the scripts and the dashboard talk to:
+#   'memgraph' (default) - the real gqlalchemy client
+#   'record'             - the real client, with every query, its parameters and
+#                          fetched rows appended to MEMGRAPH_RECORDING (JSON lines)
+#   'replay'             - an in-process stand-in, no server needed: queries are
+#                          counted, each round trip sleeps MEMGRAPH_LATENCY_MS and
+#                          execute_and_fetch returns the rows recorded for the same
+#                          query in MEMGRAPH_RECORDING (or no rows)
+BACKENDS = ('memgraph', 'record', 'replay')
+DEFAULT_BACKEND = 'memgraph'
+
+
+# Round trips, rows sent and time spent per query (by the name registered with
+# queryMetrics.name_query), shared by all clients of a factory (e.g. every
+# connection of the dashboard pool). With a path, every call is also written
+# out as one JSON line.
+class Recorder:
+    def __init__(self, path=None, query_names=None):
+        self.path = path
+        self.query_names = {normalize_query(query): name for query, name in (query_names or {}).items()}
+        self.queries = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8') if path else None
+        if self._file:
+            atexit.register(self.close)
+
+    def name(self, query):
+        normalized = normalize_query(query)
+        return self.query_names.get(normalized) or query_name(query) or normalized[:80]
+
+    def record(self, query, parameters, seconds, response=None):
+        name = self.name(query)
+        rows = count_rows(parameters)
+        with self._lock:
+            stats = self.queries.get(name)
+            if stats is None:
+                stats = self.queries[name] = {'round_trips': 0, 'rows': 0, 'min_batch': rows, 'max_batch': rows, 'seconds': 0.0}
+            stats['round_trips'] += 1
+            stats['rows'] += rows
+            stats['min_batch'] = min(stats['min_batch'], rows)
+            stats['max_batch'] = max(stats['max_batch'], rows)
+            stats['seconds'] += seconds
+            if self._file:
+                entry = {'query': query, 'parameters': parameters or {}}
+                if response is not None:
+                    entry['response'] = response
+                self._file.write(json.dumps(entry, default=str) + '\n')
+
+    def summary(self):
+        with self._lock:
+            queries = {
+                name: dict(stats, mean_batch=round(stats['rows'] / stats['round_trips'], 1), seconds=round(stats['seconds'], 6))
+                for name, stats in self.queries.items()
+            }
+        return {
+            'round_trips': sum(stats['round_trips'] for stats in queries.values()),
+            'rows': sum(stats['rows'] for stats in queries.values()),
+            'queries': queries,
+        }
+
+    def log(self):
+        summary = self.summary()
+        logger.info(f"Memgraph backend: {summary['round_trips']} round trips, {summary['rows']} rows sent")
+        for name, stats in summary['queries'].items():
+            logger.info(f"  {stats['round_trips']:>6} x {name} (batch {stats['min_batch']}-{stats['max_batch']}, "
+                        f"mean {stats['mean_batch']}, {stats['seconds']:.3f}s)")
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+# Rows returned by the stand-in, per query. Recorded responses are replayed in
+# order (the last one repeats once they run out); a responder is a function of
+# the query parameters, for results that depend on what was sent.
+class ResponseBook:
+    def __init__(self):
+        self._recorded = {}
+        self._responders = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_recording(cls, path):
+        book = cls()
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                entry = json.loads(line)
+                if 'response' in entry:
+                    book.add(entry['query'], entry['response'])
+        return book
+
+    def add(self, query, rows):
+        with self._lock:
+            self._recorded.setdefault(normalize_query(query), deque()).append(rows)
+
+    def respond(self, query, responder):
+        self._responders[normalize_query(query)] = responder
+
+    def rows(self, query, parameters):
+        normalized = normalize_query(query)
+        responder = self._responders.get(normalized)
+        if responder is not None:
+            return list(responder(parameters or {}))
+        with self._lock:
+            responses = self._recorded.get(normalized)
+            if not responses:
+                return []
+            return responses.popleft() if len(responses) > 1 else responses[0]
+
+
+# In-process stand-in for gqlalchemy.Memgraph
+class ReplayMemgraph:
+    def __init__(self, recorder, responses=None, latency=0.0):
+        self.recorder = recorder
+        self.responses = responses or ResponseBook()
+        self.latency = latency
+
+    def _round_trip(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def execute(self, query, parameters=None):
+        start = time.perf_counter()
+        self._round_trip()
+        self.recorder.record(query, parameters, time.perf_counter() - start)
+
+    def execute_and_fetch(self, query, parameters=None):
+        start = time.perf_counter()
+        self._round_trip()
+        rows = [dict(row) for row in self.responses.rows(query, parameters)]
+        self.recorder.record(query, parameters, time.perf_counter() - start)
+        return iter(rows)
+
+    def drop_database(self):
+        self.execute("MATCH (n) DETACH DELETE n;")
+
+
+# Real client whose calls are timed and written to the recording
+class RecordingMemgraph:
+    def __init__(self, client, recorder):
+        self.client = client
+        self.recorder = recorder
+
+    def execute(self, query, parameters=None):
+        start = time.perf_counter()
+        self.client.execute(query, parameters or {})
+        self.recorder.record(query, parameters, time.perf_counter() - start)
+
+    def execute_and_fetch(self, query, parameters=None):
+        start = time.perf_counter()
+        rows = list(self.client.execute_and_fetch(query, parameters or {}))
+        self.recorder.record(query, parameters, time.perf_counter() - start, response=rows)
+        return iter(rows)
+
+    def drop_database(self):
+        self.execute("MATCH (n) DETACH DELETE n;")
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+# Returns a function that opens a new client of the configured backend; all
+# clients of one factory share its recorder (factory.recorder, None for 'memgraph')
+def memgraph_factory(host=None, port=None, backend=None, recording=None, latency_ms=None, responses=None, query_names=None):
+    host = host or os.environ.get('MEMGRAPH_HOST', '127.0.0.1')
+    port = int(port or os.environ.get('MEMGRAPH_PORT', 7687))
+    backend = backend or os.environ.get('MEMGRAPH_BACKEND', DEFAULT_BACKEND)
+    recording = recording or os.environ.get('MEMGRAPH_RECORDING') or None
+    latency = float(latency_ms if latency_ms is not None else os.environ.get('MEMGRAPH_LATENCY_MS', 0)) / 1000.0
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown MEMGRAPH_BACKEND {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+    if backend == 'replay':
+        recorder = Recorder(query_names=query_names)
+        if responses is None:
+            responses = ResponseBook.from_recording(recording) if recording else ResponseBook()
+        logger.info(f"Using the in-process Memgraph stand-in ({latency * 1000:.1f} ms per round trip)")
+
+        def factory():
+            return ReplayMemgraph(recorder, responses, latency)
+    else:
+        from gqlalchemy import Memgraph
+
+        recorder = None
+        if backend == 'record':
+            if not recording:
+                raise ValueError("MEMGRAPH_BACKEND=record needs MEMGRAPH_RECORDING (output file)")
+            recorder = Recorder(recording, query_names)
+            logger.info(f"Recording Memgraph queries to {recording}")
+
+        def factory():
+            client = Memgraph(host, port)
+            return RecordingMemgraph(client, recorder) if recorder else client
+
+    factory.recorder = recorder
+    return factory
+
+
+def connect(host=None, port=None, **kwargs):
+    return memgraph_factory(host, port, **kwargs)()
@@ -1,87 +1,14 @@
-from gqlalchemy import Memgraph
-
-# Establish a connection to the Memgraph instance
-memgraph = Memgraph("127.0.0.1", 7687)
-
-# Drop the existing database to start fresh
-memgraph.drop_database()
-
-# Load data for Invoices nodes and create the nodes in the graph
-memgraph.execute("""
-LOAD CSV FROM "/memgraph/FraudDetectionMemgraph/InvoicesFraud.csv" WITH HEADER AS row
-MERGE (i:Invoice {invoiceID: toInteger(row.invoice_id)})
-ON CREATE SET
-    i.invoiceDate = row.invoice_date,
-    i.totalAmount = row.total_amount,
-    i.supplierIBAN = row.supplier_iban,
-    i.status = row.status,
-    i.dueDate = row.due_date,
-    i.supplierTAXID = row.supplier_tax_id,
-    i.fraud = toInteger(row.fraud)
-RETURN i;
-""")
-
-# Load data for User nodes and create the nodes in the graph
-memgraph.execute("""
-LOAD CSV FROM "/memgraph/FraudDetectionMemgraph/InvoicesFraud.csv" WITH HEADER AS row
-MERGE (u:User {userID: toInteger(row.user_id)})
-ON CREATE SET
-    u.id = id(u),
-    u.VATNumber = row.vat_number,
-    u.userName = row.user_name,
-    u.email = row.email,
-    u.phoneNumber = row.phone_number,
-    u.registrationDate = row.registration_date,
-    u.fraud = toInteger(row.fraud)
-RETURN u;
-""")
-
-# Create relationships between Invoices and Users based on the uploaded invoice data
-memgraph.execute("""
-LOAD CSV FROM "/memgraph/FraudDetectionMemgraph/InvoicesFraud.csv" WITH HEADER AS row
-MATCH (i:Invoice {invoiceID: toInteger(row.invoice_id)})
-MATCH (u:User {userID: toInteger(row.user_id)})
-MERGE (i)-[:UPLOADED_BY]->(u)
-RETURN i, u;
-""")
-
-# Create relationships between Invoices and Users based on the supplier's TAX ID
-memgraph.execute("""
-LOAD CSV FROM "/memgraph/FraudDetectionMemgraph/InvoicesFraud.csv" WITH HEADER AS row
-MATCH (i:Invoice {invoiceID: toInteger(row.invoice_id)})
-WHERE i.supplierTAXID IS NOT NULL
-MATCH (user_to_pay:User {VATNumber: i.supplierTAXID})
-WHERE user_to_pay.VATNumber IS NOT NULL
-MERGE (i)-[:NEEDS_PAYMENT_FROM]->(user_to_pay)
-RETURN i, user_to_pay;
-""")
-
-# Perform the node2vec algorithm for graph embedding to create vector representations of nodes
-memgraph.execute("""
- CALL node2vec.set_embeddings(
-                    False,        
-                    1.0,            
-                    1.0,            
-                    5,             
-                    20,             
-                    64,            
-                    0.025,          
-                    5,             
-                    1,             
-                    1,             
-                    4,             
-                    0.0001,         
-                    1,             
-                    0,             
-                    5,             
-                    5,             
-                    "weight"        
-                )
-                YIELD *;
-""")
+import argparse
+import logging
+from memgraphBackend import memgraph_factory
+from bulkLoader import DEFAULT_BATCH_SIZE, load_invoice_csv
+from memgraphSchema import ensure_schema
+from embeddings import set_full_embeddings
+from queryMetrics import name_query
+from graphReset import drop_graph
 
 # Set model parameters for node classification, targeting fraud detection as the classification task
-memgraph.execute("""
+SET_MODEL_PARAMETERS_QUERY = name_query('set_model_parameters', """
   CALL node_classification.set_model_parameters(
     {layer_type: "GATJK", learning_rate: 0.001, hidden_features_size: [16,16], class_name: "fraud", features_name: "embedding"}
   ) YIELD aggregator, metrics
@@ -89,15 +16,59 @@ memgraph.execute("""
 """)
 
 # Train the node classification model using the data and embeddings
-memgraph.execute("""
+TRAIN_QUERY = name_query('train', """
 CALL node_classification.train(80) PROCEDURE MEMORY UNLIMITED YIELD *;
 """)
 
 # Save the trained model for future use
-memgraph.execute("""
-  CALL node_classification.save_model() 
+SAVE_MODEL_QUERY = name_query('save_model', """
+  CALL node_classification.save_model()
   YIELD *
   RETURN *
 """)
 
-print("Data loaded successfully!")
\ No newline at end of file
+
+# Full pipeline on an empty database: schema, bulk load, embeddings, node classification
+def load_and_train(memgraph, csv_path, batch_size=DEFAULT_BATCH_SIZE):
+    # Create indexes and uniqueness constraints before loading so MERGE/MATCH use index lookups
+    ensure_schema(memgraph)
+
+    # Read the CSV once and send nodes, then edges, in parameterized UNWIND batches
+    stats = load_invoice_csv(memgraph, csv_path, batch_size=batch_size)
+
+    # Perform the node2vec algorithm for graph embedding to create vector representations of nodes
+    set_full_embeddings(memgraph)
+
+    memgraph.execute(SET_MODEL_PARAMETERS_QUERY)
+    memgraph.execute(TRAIN_QUERY)
+    memgraph.execute(SAVE_MODEL_QUERY)
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load the invoice dataset into Memgraph and train the fraud model")
+    parser.add_argument('--csv', default='InvoicesFraud.csv', help="Path to the CSV produced by datasetcsvGenerator.py")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows per UNWIND batch")
+    parser.add_argument('--fast-reset', action='store_true', help="Wipe the database with DROP GRAPH instead of DETACH DELETE")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Establish a connection to the Memgraph instance (or the stand-in selected by MEMGRAPH_BACKEND)
+    connect = memgraph_factory()
+    memgraph = connect()
+
+    # Drop the existing database to start fresh (load_and_train re-creates the schema)
+    if args.fast_reset:
+        drop_graph(memgraph)
+    else:
+        memgraph.drop_database()
+
+    stats = load_and_train(memgraph, args.csv, args.batch_size)
+    for stage, stage_stats in stats.as_dict().items():
+        print(f"{stage}: {stage_stats['rows']} rows in {stage_stats['seconds']:.2f}s "
+              f"({stage_stats['rows_per_sec']} rows/sec, {stage_stats['batches']} batches)")
+
+    print("Data loaded successfully!")
+    if connect.recorder:
+        connect.recorder.log()
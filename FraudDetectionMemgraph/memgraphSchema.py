@@ -0,0 +1,83 @@
+import logging
+from queryMetrics import name_query_prefix
+
+logger = logging.getLogger(__name__)
+
+# Label-property indexes used by the MERGE/MATCH lookups of every load path
+INDEXES = [
+    ('Invoice', 'invoiceID'),
+    ('Invoice', 'fraud'),
+    ('User', 'userID'),
+    ('User', 'VATNumber'),
+]
+
+for _prefix in ('SHOW INDEX INFO', 'SHOW CONSTRAINT INFO', 'CREATE INDEX', 'CREATE CONSTRAINT', 'DROP INDEX', 'DROP CONSTRAINT'):
+    name_query_prefix(_prefix.lower().replace(' ', '_'), _prefix)
+
+# Natural keys that must identify a single node
+UNIQUE_CONSTRAINTS = [
+    ('Invoice', 'invoiceID'),
+    ('User', 'userID'),
+    ('User', 'VATNumber'),
+]
+
+
+# SHOW ... INFO returns properties either as a string, "[a, b]" or a list depending on the Memgraph version
+def _normalize_properties(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return tuple(p.strip() for p in str(value).strip('[]').split(',') if p.strip())
+
+
+def get_existing_indexes(memgraph):
+    existing = set()
+    for row in memgraph.execute_and_fetch("SHOW INDEX INFO;"):
+        if row.get('property') is None:
+            continue
+        properties = _normalize_properties(row['property'])
+        if len(properties) == 1:
+            existing.add((row['label'], properties[0]))
+    return existing
+
+
+def get_existing_unique_constraints(memgraph):
+    existing = set()
+    for row in memgraph.execute_and_fetch("SHOW CONSTRAINT INFO;"):
+        if row.get('constraint type') != 'unique':
+            continue
+        properties = _normalize_properties(row['properties'])
+        if len(properties) == 1:
+            existing.add((row['label'], properties[0]))
+    return existing
+
+
+# Create the missing indexes and uniqueness constraints; safe to call on every start.
+# Pass constraints=False for data sets whose loader cannot yet guarantee unique keys.
+def ensure_schema(memgraph, constraints=True):
+    existing_indexes = get_existing_indexes(memgraph)
+    for label, prop in INDEXES:
+        if (label, prop) not in existing_indexes:
+            memgraph.execute(f"CREATE INDEX ON :{label}({prop});")
+            logger.info(f"Created index on :{label}({prop})")
+
+    if not constraints:
+        return
+
+    existing_constraints = get_existing_unique_constraints(memgraph)
+    for label, prop in UNIQUE_CONSTRAINTS:
+        if (label, prop) not in existing_constraints:
+            memgraph.execute(f"CREATE CONSTRAINT ON (n:{label}) ASSERT n.{prop} IS UNIQUE;")
+            logger.info(f"Created uniqueness constraint on :{label}({prop})")
+
+
+# Remove everything ensure_schema created (used to benchmark loads without the schema)
+def drop_schema(memgraph):
+    existing_constraints = get_existing_unique_constraints(memgraph)
+    for label, prop in UNIQUE_CONSTRAINTS:
+        if (label, prop) in existing_constraints:
+            memgraph.execute(f"DROP CONSTRAINT ON (n:{label}) ASSERT n.{prop} IS UNIQUE;")
+
+    existing_indexes = get_existing_indexes(memgraph)
+    for label, prop in INDEXES:
+        if (label, prop) in existing_indexes:
+            memgraph.execute(f"DROP INDEX ON :{label}({prop});")
@@ -0,0 +1,283 @@
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from index lookups to full node2vec recomputes
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Queries without a registered name are reported under this label so that
+# per-file LOAD CSV statements or ad hoc queries cannot blow up the label set
+UNNAMED_QUERY = 'other'
+
+# Plans kept per query name
+MAX_PLANS = 5
+
+_query_names = {}
+_query_prefixes = []
+
+
+def normalize_query(query):
+    return ' '.join(query.split())
+
+
+# Register the name under which a query is reported; returns the query so that
+# module constants can be declared as QUERY = name_query('name', """...""")
+def name_query(name, query):
+    _query_names[normalize_query(query)] = name
+    return query
+
+
+# Name every query starting with prefix (generated queries such as CREATE INDEX ON ...)
+def name_query_prefix(name, prefix):
+    _query_prefixes.append((normalize_query(prefix), name))
+
+
+def query_name(query):
+    normalized = normalize_query(query)
+    name = _query_names.get(normalized)
+    if name is not None:
+        return name
+    for prefix, name in _query_prefixes:
+        if normalized.startswith(prefix):
+            return name
+    return None
+
+
+def count_rows(parameters):
+    rows = 0
+    for value in (parameters or {}).values():
+        if isinstance(value, list):
+            rows = max(rows, len(value))
+    return rows
+
+
+# Cumulative histogram in the Prometheus layout: bucket counts are <= bound
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'buckets': OrderedDict((str(bound), count) for bound, count in zip(self.buckets, self.counts)),
+        }
+
+
+# Latency, rows sent, rows returned and errors per query name
+class QueryMetrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, rows_sent=0, rows_returned=0, failed=False):
+        with self._lock:
+            stats = self._queries.get(name)
+            if stats is None:
+                stats = self._queries[name] = {'latency': Histogram(self.buckets), 'rows_sent': 0, 'rows_returned': 0, 'errors': 0}
+            stats['latency'].observe(seconds)
+            stats['rows_sent'] += rows_sent
+            stats['rows_returned'] += rows_returned
+            if failed:
+                stats['errors'] += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                name: {
+                    'latency': stats['latency'].as_dict(),
+                    'rows_sent': stats['rows_sent'],
+                    'rows_returned': stats['rows_returned'],
+                    'errors': stats['errors'],
+                }
+                for name, stats in self._queries.items()
+            }
+
+
+# Request latency per route and method, request counts per status code
+class RequestMetrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._latency = OrderedDict()
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, route, method, status, seconds):
+        with self._lock:
+            histogram = self._latency.get((route, method))
+            if histogram is None:
+                histogram = self._latency[(route, method)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            key = (route, method, str(status))
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            latency = {key: histogram.as_dict() for key, histogram in self._latency.items()}
+            return latency, dict(self._responses)
+
+
+# Only statements that can run under PROFILE (not index, constraint or SHOW statements)
+def profilable(query):
+    words = normalize_query(query).upper().split(' ', 2)
+    if words[0] in ('MATCH', 'OPTIONAL', 'UNWIND', 'MERGE', 'CALL', 'WITH', 'LOAD', 'RETURN'):
+        return True
+    return words[0] == 'CREATE' and len(words) > 1 and words[1] not in ('INDEX', 'CONSTRAINT')
+
+
+# Captures the plan of a sampled fraction of the queries. Statements run through
+# execute() are sent as PROFILE <query> (executed once, with per-operator hits and
+# timings); queries whose rows are needed get a separate EXPLAIN, which plans
+# without executing.
+class PlanSampler:
+    def __init__(self, sample_rate=0.0, max_plans=MAX_PLANS):
+        self.sample_rate = sample_rate
+        self.max_plans = max_plans
+        self._plans = OrderedDict()
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def sample(self, query):
+        return self.sample_rate > 0 and self._random.random() < self.sample_rate and profilable(query)
+
+    def add(self, name, mode, seconds, plan):
+        entry = {
+            'mode': mode,
+            'captured_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seconds': round(seconds, 6),
+            'plan': plan,
+        }
+        with self._lock:
+            self._plans.setdefault(name, deque(maxlen=self.max_plans)).append(entry)
+
+    def as_dict(self):
+        with self._lock:
+            return {name: list(plans) for name, plans in self._plans.items()}
+
+
+# Wraps a Memgraph client and reports every call to QueryMetrics. Fetched rows
+# are read before returning, so the latency covers the whole result transfer.
+class InstrumentedMemgraph:
+    def __init__(self, client, metrics, sampler=None):
+        self.client = client
+        self.metrics = metrics
+        self.sampler = sampler
+
+    def execute(self, query, parameters=None):
+        name = query_name(query) or UNNAMED_QUERY
+        profile = self.sampler is not None and self.sampler.sample(query)
+        start = time.perf_counter()
+        try:
+            if profile:
+                plan = list(self.client.execute_and_fetch(f"PROFILE {query}", parameters or {}))
+            else:
+                self.client.execute(query, parameters or {})
+        except Exception:
+            self.metrics.observe(name, time.perf_counter() - start, count_rows(parameters), failed=True)
+            raise
+        seconds = time.perf_counter() - start
+        self.metrics.observe(name, seconds, count_rows(parameters))
+        if profile:
+            self.sampler.add(name, 'PROFILE', seconds, plan)
+
+    def execute_and_fetch(self, query, parameters=None):
+        name = query_name(query) or UNNAMED_QUERY
+        start = time.perf_counter()
+        try:
+            rows = list(self.client.execute_and_fetch(query, parameters or {}))
+        except Exception:
+            self.metrics.observe(name, time.perf_counter() - start, count_rows(parameters), failed=True)
+            raise
+        seconds = time.perf_counter() - start
+        self.metrics.observe(name, seconds, count_rows(parameters), len(rows))
+        if self.sampler is not None and self.sampler.sample(query):
+            self._explain(name, query, parameters, seconds)
+        return iter(rows)
+
+    def _explain(self, name, query, parameters, seconds):
+        try:
+            plan = list(self.client.execute_and_fetch(f"EXPLAIN {query}", parameters or {}))
+        except Exception as e:
+            logger.warning(f"Could not capture the plan of {name}: {str(e)}")
+            return
+        self.sampler.add(name, 'EXPLAIN', seconds, plan)
+
+    def drop_database(self):
+        self.execute("MATCH (n) DETACH DELETE n;")
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _histogram_lines(metric, histogram, labels):
+    lines = []
+    for bound, count in histogram['buckets'].items():
+        lines.append(f"{metric}_bucket{_labels(**labels, le=bound)} {count}")
+    lines.append(f"{metric}_bucket{_labels(**labels, le='+Inf')} {histogram['count']}")
+    lines.append(f"{metric}_sum{_labels(**labels)} {histogram['sum']}")
+    lines.append(f"{metric}_count{_labels(**labels)} {histogram['count']}")
+    return lines
+
+
+# Prometheus text exposition format (version 0.0.4)
+def render_prometheus(query_metrics, request_metrics, gauges=None, counters=None):
+    lines = []
+    queries = query_metrics.as_dict()
+
+    lines.append('# HELP memgraph_query_duration_seconds Memgraph query latency by query name.')
+    lines.append('# TYPE memgraph_query_duration_seconds histogram')
+    for name, stats in queries.items():
+        lines.extend(_histogram_lines('memgraph_query_duration_seconds', stats['latency'], {'query': name}))
+
+    for key, description in (
+        ('rows_sent', 'Rows sent as query parameters.'),
+        ('rows_returned', 'Rows returned by queries.'),
+        ('errors', 'Failed queries.'),
+    ):
+        metric = f"memgraph_query_{key}_total"
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} counter")
+        for name, stats in queries.items():
+            lines.append(f"{metric}{_labels(query=name)} {stats[key]}")
+
+    latency, responses = request_metrics.snapshot()
+    lines.append('# HELP http_request_duration_seconds Request latency by route.')
+    lines.append('# TYPE http_request_duration_seconds histogram')
+    for (route, method), histogram in latency.items():
+        lines.extend(_histogram_lines('http_request_duration_seconds', histogram, {'route': route, 'method': method}))
+
+    lines.append('# HELP http_requests_total Requests by route and status code.')
+    lines.append('# TYPE http_requests_total counter')
+    for (route, method, status), count in responses.items():
+        lines.append(f"http_requests_total{_labels(route=route, method=method, status=status)} {count}")
+
+    for kind, metrics in (('gauge', gauges), ('counter', counters)):
+        for metric, (description, value) in (metrics or {}).items():
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric} {value}")
+
+    return '\n'.join(lines) + '\n'
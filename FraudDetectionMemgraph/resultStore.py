@@ -0,0 +1,187 @@
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = ('invoiceID', 'predicted_class')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Upload keys become file names when spilled
+_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+# Predictions of one upload as two parallel arrays (9 bytes per invoice)
+class ResultSet:
+    def __init__(self, invoice_ids, predicted_classes):
+        self.invoice_ids = np.asarray(invoice_ids, dtype=np.int64)
+        self.predicted_classes = np.asarray(predicted_classes, dtype=np.int8)
+        self._order_key = None
+        self._order = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.invoice_ids)
+
+    @property
+    def nbytes(self):
+        return self.invoice_ids.nbytes + self.predicted_classes.nbytes
+
+    def summary(self):
+        return {'total': len(self), 'fraudulent': int(np.count_nonzero(self.predicted_classes == 1))}
+
+    # Positions of the matching rows in display order; ties are broken by invoice ID.
+    # The last ordering is kept so that paging through a result does not re-sort it.
+    def select(self, predicted_class=None, sort='invoiceID', descending=False):
+        key = (predicted_class, sort, descending)
+        with self._lock:
+            if self._order_key == key:
+                return self._order
+
+        if sort == 'predicted_class':
+            order = np.lexsort((self.invoice_ids, self.predicted_classes))
+        else:
+            order = np.argsort(self.invoice_ids, kind='stable')
+        if descending:
+            order = order[::-1]
+        if predicted_class is not None:
+            order = order[self.predicted_classes[order] == predicted_class]
+
+        with self._lock:
+            self._order_key, self._order = key, order
+        return order
+
+    def rows(self, positions):
+        return [
+            {'invoiceID': int(invoice_id), 'predicted_class': int(predicted_class)}
+            for invoice_id, predicted_class in zip(self.invoice_ids[positions], self.predicted_classes[positions])
+        ]
+
+    def page(self, page=1, per_page=DEFAULT_PAGE_SIZE, predicted_class=None, sort='invoiceID', descending=False):
+        order = self.select(predicted_class, sort, descending)
+        total = len(order)
+        pages = max(1, -(-total // per_page))
+        page = min(max(1, page), pages)
+        start = (page - 1) * per_page
+        return {
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': pages,
+            'rows': self.rows(order[start:start + per_page]),
+        }
+
+    # All matching rows, chunk by chunk (for exports)
+    def iter_chunks(self, chunk_size=10000, predicted_class=None, sort='invoiceID', descending=False):
+        order = self.select(predicted_class, sort, descending)
+        for start in range(0, len(order), chunk_size):
+            yield self.rows(order[start:start + chunk_size])
+
+
+# LRU of result sets keyed by upload (job ID). At most max_uploads sets and
+# max_rows invoices are kept in memory; with a spill directory, evicted sets
+# are written there as .npy files and served memory-mapped until max_spilled
+# newer sets have been spilled after them.
+class ResultStore:
+    def __init__(self, max_uploads=20, max_rows=5000000, spill_dir=None, max_spilled=200):
+        self.max_uploads = max_uploads
+        self.max_rows = max_rows
+        self.spill_dir = spill_dir
+        self.max_spilled = max_spilled
+        self._memory = OrderedDict()
+        self._spilled = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._clear_spill_dir()
+
+    def put(self, key, results):
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid result key {key!r}")
+        with self._lock:
+            self._remove(key)
+            self._memory[key] = results
+            self._rows += len(results)
+            self._evict()
+
+    def get(self, key):
+        with self._lock:
+            results = self._memory.get(key)
+            if results is not None:
+                self._memory.move_to_end(key)
+                return results
+            if key not in self._spilled:
+                return None
+        return self._load_spilled(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._memory or key in self._spilled
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'uploads_in_memory': len(self._memory),
+                'rows_in_memory': self._rows,
+                'bytes_in_memory': sum(results.nbytes for results in self._memory.values()),
+                'uploads_spilled': len(self._spilled),
+            }
+
+    def _paths(self, key):
+        return (os.path.join(self.spill_dir, f"{key}.invoice_ids.npy"),
+                os.path.join(self.spill_dir, f"{key}.predicted_classes.npy"))
+
+    def _load_spilled(self, key):
+        ids_path, classes_path = self._paths(key)
+        try:
+            return ResultSet(np.load(ids_path, mmap_mode='r'), np.load(classes_path, mmap_mode='r'))
+        except OSError as e:
+            logger.warning(f"Could not read spilled results {key}: {str(e)}")
+            return None
+
+    def _remove(self, key):
+        results = self._memory.pop(key, None)
+        if results is not None:
+            self._rows -= len(results)
+        if self._spilled.pop(key, None):
+            self._delete_spilled(key)
+
+    def _evict(self):
+        # The newest set stays in memory even when it alone exceeds max_rows
+        while len(self._memory) > 1 and (len(self._memory) > self.max_uploads or self._rows > self.max_rows):
+            key, results = self._memory.popitem(last=False)
+            self._rows -= len(results)
+            if self.spill_dir:
+                self._spill(key, results)
+
+        while len(self._spilled) > self.max_spilled:
+            key, _ = self._spilled.popitem(last=False)
+            self._delete_spilled(key)
+
+    def _spill(self, key, results):
+        ids_path, classes_path = self._paths(key)
+        try:
+            np.save(ids_path, results.invoice_ids)
+            np.save(classes_path, results.predicted_classes)
+        except OSError as e:
+            logger.warning(f"Could not spill results {key}, dropping them: {str(e)}")
+            return
+        self._spilled[key] = True
+
+    # Files spilled by a previous process cannot be looked up any more (upload keys are per process)
+    def _clear_spill_dir(self):
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(('.invoice_ids.npy', '.predicted_classes.npy')):
+                os.remove(os.path.join(self.spill_dir, name))
+
+    def _delete_spilled(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -1,19 +1,237 @@
-from gqlalchemy import Memgraph
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# Connect to the Memgraph database
-memgraph = Memgraph("127.0.0.1", 7687)
+# The schema and batching helpers are shared with the FraudDetectionMemgraph project
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'FraudDetectionMemgraph'))
+from memgraphSchema import ensure_schema
+from bulkLoader import StageStats, batched, to_float, to_int
+from memgraphBackend import memgraph_factory
 
-# If you want to clean the database before loading new data
-memgraph.drop_database()
+try:
+    from gqlalchemy.exceptions import GQLAlchemyTransientError
+except ImportError:  # older gqlalchemy releases only raise GQLAlchemyDatabaseError
+    GQLAlchemyTransientError = None
 
-# Load data from the CSV file and add the 'fraud' label
-memgraph.execute("""
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'invoice_with_fraud2.csv')
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_WORKERS = 4
+MAX_RETRIES = 5
+
+# Previous loader, kept for comparison (benchmarks/bench_ml_loader.py): every
+# MERGE matches on all properties, so a supplier stub {VATNumber} and a full
+# user row with the same VATNumber become two User nodes
+LOAD_QUERY = """
     LOAD CSV FROM "/mnt/data/invoice_with_fraud2.csv" WITH HEADER AS row
     MERGE (u:User {VATNumber: row.vat_number, userName: row.user_name, email: row.email, phoneNumber: row.phone_number, registrationDate: row.registration_date})
     MERGE (i:Invoice {invoiceID: row.invoice_id, invoiceDate: row.invoice_date, totalAmount: row.total_amount, supplierIBAN: row.supplier_iban, status: row.status, dueDate: row.due_date, supplierTAXID: row.supplier_tax_id, fraud: toInteger(row.fraud)})
     MERGE (u2:User {VATNumber: row.supplier_tax_id})
     MERGE (u)-[:UPLOADED_BY]->(i)
     MERGE (i)-[:NEEDS_PAYMENT_FROM]->(u2);
-""")
+"""
+
+# Upserts by natural key; the other properties are written on create and refreshed on match
+USER_UPSERT_QUERY = """
+UNWIND $rows AS row
+MERGE (u:User {VATNumber: row.vat_number})
+ON CREATE SET u.userName = row.user_name, u.email = row.email, u.phoneNumber = row.phone_number, u.registrationDate = row.registration_date
+ON MATCH SET u.userName = row.user_name, u.email = row.email, u.phoneNumber = row.phone_number, u.registrationDate = row.registration_date
+"""
+
+# Suppliers that never appear as uploading users only get their key
+SUPPLIER_UPSERT_QUERY = """
+UNWIND $rows AS row
+MERGE (u:User {VATNumber: row.vat_number})
+"""
+
+INVOICE_UPSERT_QUERY = """
+UNWIND $rows AS row
+MERGE (i:Invoice {invoiceID: row.invoice_id})
+ON CREATE SET i.invoiceDate = row.invoice_date, i.totalAmount = row.total_amount, i.supplierIBAN = row.supplier_iban, i.status = row.status, i.dueDate = row.due_date, i.supplierTAXID = row.supplier_tax_id, i.fraud = row.fraud
+ON MATCH SET i.invoiceDate = row.invoice_date, i.totalAmount = row.total_amount, i.supplierIBAN = row.supplier_iban, i.status = row.status, i.dueDate = row.due_date, i.supplierTAXID = row.supplier_tax_id, i.fraud = row.fraud
+"""
+
+UPLOADED_BY_QUERY = """
+UNWIND $rows AS row
+MATCH (u:User {VATNumber: row.vat_number})
+MATCH (i:Invoice {invoiceID: row.invoice_id})
+MERGE (u)-[:UPLOADED_BY]->(i)
+"""
+
+NEEDS_PAYMENT_FROM_QUERY = """
+UNWIND $rows AS row
+MATCH (i:Invoice {invoiceID: row.invoice_id})
+MATCH (u:User {VATNumber: row.supplier_tax_id})
+MERGE (i)-[:NEEDS_PAYMENT_FROM]->(u)
+"""
+
+# Extra nodes per natural key; 0 everywhere means no duplicates
+DUPLICATE_QUERIES = {
+    'User.VATNumber': "MATCH (n:User) WITH n.VATNumber AS key, count(n) AS nodes WHERE nodes > 1 RETURN count(key) AS keys, sum(nodes - 1) AS extra;",
+    'Invoice.invoiceID': "MATCH (n:Invoice) WITH n.invoiceID AS key, count(n) AS nodes WHERE nodes > 1 RETURN count(key) AS keys, sum(nodes - 1) AS extra;",
+}
+
+
+# Read the CSV once and deduplicate client-side: the first row of a user or an
+# invoice wins, edges are sent once, and suppliers that are also uploading
+# users are not sent as stubs
+def read_rows(csv_path):
+    users = {}
+    invoices = {}
+    uploaded_by = set()
+    needs_payment_from = set()
+
+    with open(csv_path, mode='r', newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            vat_number = row['vat_number']
+            invoice_id = to_int(row['invoice_id'])
+            supplier_tax_id = row.get('supplier_tax_id') or None
+
+            if vat_number not in users:
+                users[vat_number] = {
+                    'vat_number': vat_number,
+                    'user_name': row['user_name'],
+                    'email': row['email'],
+                    'phone_number': row['phone_number'],
+                    'registration_date': row['registration_date'],
+                }
+            if invoice_id not in invoices:
+                invoices[invoice_id] = {
+                    'invoice_id': invoice_id,
+                    'invoice_date': row['invoice_date'],
+                    'total_amount': to_float(row['total_amount']),
+                    'supplier_iban': row['supplier_iban'],
+                    'status': row['status'],
+                    'due_date': row['due_date'],
+                    'supplier_tax_id': supplier_tax_id,
+                    'fraud': to_int(row.get('fraud'), -1),
+                }
+            uploaded_by.add((vat_number, invoice_id))
+            if supplier_tax_id is not None:
+                needs_payment_from.add((invoice_id, supplier_tax_id))
+
+    suppliers = sorted({supplier for _, supplier in needs_payment_from} - set(users))
+    return {
+        'users': list(users.values()),
+        'suppliers': [{'vat_number': vat_number} for vat_number in suppliers],
+        'invoices': list(invoices.values()),
+        'uploaded_by': [{'vat_number': vat, 'invoice_id': invoice_id} for vat, invoice_id in sorted(uploaded_by)],
+        'needs_payment_from': [{'invoice_id': invoice_id, 'supplier_tax_id': vat} for invoice_id, vat in sorted(needs_payment_from)],
+    }
+
+
+def is_retryable(error):
+    if GQLAlchemyTransientError is not None and isinstance(error, GQLAlchemyTransientError):
+        return True
+    return 'conflicting transactions' in str(error).lower()
+
+
+# Runs the batches of each stage on a thread pool, one Memgraph connection per
+# thread. Node batches never share a key after deduplication; edge batches can
+# touch the same nodes concurrently, so conflicting transactions are retried
+# with jittered backoff.
+class ParallelLoader:
+    def __init__(self, connect, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, max_retries=MAX_RETRIES):
+        self.connect = connect
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.stats = StageStats()
+        self.wall_seconds = {}
+        self.retries = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _memgraph(self):
+        if not hasattr(self._local, 'memgraph'):
+            self._local.memgraph = self.connect()
+        return self._local.memgraph
+
+    def _execute(self, query, rows):
+        memgraph = self._memgraph()
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                memgraph.execute(query, {'rows': rows})
+                return len(rows), time.perf_counter() - start
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+
+    # stats holds the time spent in each batch, wall_seconds the elapsed time of the stage
+    def run_stage(self, stage, query, rows):
+        batches = list(batched(rows, self.batch_size))
+        start = time.perf_counter()
+        for count, seconds in self._executor.map(lambda batch: self._execute(query, batch), batches):
+            self.stats.add(stage, count, seconds)
+        self.wall_seconds[stage] = time.perf_counter() - start
+
+    # Nodes first (every stage finishes before the next starts), then edges;
+    # worker threads and their connections are reused across stages
+    def load(self, data):
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='loader') as self._executor:
+            self.run_stage('users', USER_UPSERT_QUERY, data['users'])
+            self.run_stage('suppliers', SUPPLIER_UPSERT_QUERY, data['suppliers'])
+            self.run_stage('invoices', INVOICE_UPSERT_QUERY, data['invoices'])
+            self.run_stage('uploaded_by', UPLOADED_BY_QUERY, data['uploaded_by'])
+            self.run_stage('needs_payment_from', NEEDS_PAYMENT_FROM_QUERY, data['needs_payment_from'])
+        return self.stats
+
+
+def load_csv(connect, csv_path=DEFAULT_CSV, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS):
+    loader = ParallelLoader(connect, workers, batch_size)
+    loader.load(read_rows(csv_path))
+    return loader
+
+
+def count_duplicates(memgraph):
+    result = {}
+    for key, query in DUPLICATE_QUERIES.items():
+        row = next(memgraph.execute_and_fetch(query), {})
+        result[key] = {'keys': row.get('keys') or 0, 'extra_nodes': row.get('extra') or 0}
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load invoice_with_fraud2.csv into Memgraph with key-based upserts")
+    parser.add_argument('--csv', default=DEFAULT_CSV, help="CSV file read by this script (not by the Memgraph server)")
+    parser.add_argument('--host', help="Memgraph host (default: MEMGRAPH_HOST or 127.0.0.1)")
+    parser.add_argument('--port', type=int, help="Memgraph port (default: MEMGRAPH_PORT or 7687)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Parallel connections per stage")
+    args = parser.parse_args()
+
+    # Connect to the Memgraph database (or the stand-in selected by MEMGRAPH_BACKEND)
+    connect = memgraph_factory(args.host, args.port)
+    memgraph = connect()
+
+    # If you want to clean the database before loading new data
+    memgraph.drop_database()
+
+    # Keys are unique now, so the uniqueness constraints can be enforced
+    ensure_schema(memgraph)
+
+    loader = load_csv(connect, args.csv, args.batch_size, args.workers)
+    loader.stats.log()
+    for stage, stats in loader.stats.as_dict().items():
+        seconds = loader.wall_seconds[stage]
+        rows_per_sec = stats['rows'] / seconds if seconds > 0 else 0.0
+        print(f"{stage}: {stats['rows']} rows in {seconds:.2f}s ({rows_per_sec:.1f} rows/sec)")
+    if loader.retries:
+        print(f"Retried {loader.retries} conflicting batches")
+
+    for key, duplicates in count_duplicates(memgraph).items():
+        print(f"Duplicate {key}: {duplicates['extra_nodes']} extra nodes")
 
-print("Data loaded into Memgraph successfully.")
+    print("Data loaded into Memgraph successfully.")
+    if connect.recorder:
+        connect.recorder.log()
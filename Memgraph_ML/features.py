@@ -0,0 +1,69 @@
+# Feature encoding shared by training (Traitment.py) and scoring (main.py,
+# batch scoring). The transformer is stored in the model manifest (see
+# modelStore.py) so both sides always use the same feature order and status codes.
+import os
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FEATURE_NAMES = ['total_amount', 'status', 'due_date']
+
+# dtype of each column before the features are stacked into a float64 matrix
+FEATURE_DTYPES = {'total_amount': 'float64', 'status': 'int64', 'due_date': 'int64'}
+
+# Same codes LabelEncoder produced when the model was first trained
+# (classes sorted alphabetically), so existing models keep working
+STATUS_MAP = {'overdue': 0, 'paid': 1, 'pending': 2}
+
+
+# Dates (ISO 8601 strings, datetimes or datetime64) to int64 seconds since the
+# epoch; integers are taken as epoch seconds already. Each string is parsed on
+# its own, so '2025-12-31' and '2025-12-31 00:00:00' can share a batch.
+def to_epoch_seconds(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.integer):
+        return values.astype(np.int64)
+    if not np.issubdtype(values.dtype, np.datetime64):
+        values = pd.to_datetime(values, format='ISO8601').to_numpy()
+    return values.astype('datetime64[s]').astype(np.int64)
+
+
+class FeatureTransformer:
+    def __init__(self, status_map=None, feature_names=None):
+        self.status_map = dict(status_map or STATUS_MAP)
+        self.feature_names = list(feature_names or FEATURE_NAMES)
+
+    # Unknown statuses are an error rather than a silently new code
+    def encode_status(self, statuses):
+        codes = pd.Series(np.asarray(statuses, dtype=object)).map(self.status_map)
+        if codes.isna().any():
+            unknown = sorted(set(np.asarray(statuses, dtype=object)[codes.isna().to_numpy()].tolist()))
+            raise ValueError(f"Unknown invoice status: {unknown}")
+        return codes.to_numpy(dtype=np.int64)
+
+    # Columns of a DataFrame (or dict of lists) to a float64 matrix in feature_names order
+    def transform(self, data):
+        columns = {
+            'total_amount': np.asarray(data['total_amount'], dtype=np.float64),
+            'status': self.encode_status(data['status']),
+            'due_date': to_epoch_seconds(data['due_date']),
+        }
+        return np.column_stack([columns[name].astype(np.float64) for name in self.feature_names])
+
+    def dmatrix(self, data, label=None, nthread=None):
+        return xgb.DMatrix(self.transform(data), label=label, feature_names=self.feature_names,
+                           nthread=-1 if nthread is None else nthread)
+
+    def to_dict(self):
+        return {
+            'feature_names': self.feature_names,
+            'feature_dtypes': {name: FEATURE_DTYPES[name] for name in self.feature_names},
+            'status_map': self.status_map,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['status_map'], data['feature_names'])
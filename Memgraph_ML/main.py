@@ -1,15 +1,46 @@
+import os
+import sys
+import argparse
 import random
 import csv
-from datetime import datetime
-import xgboost as xgb
-import joblib
+import time
+import itertools
 from faker import Faker
-from sklearn.preprocessing import LabelEncoder
-import pandas as pd
-from gqlalchemy import Memgraph
+
+from features import BASE_DIR
+from modelStore import load_model
+
+# The Memgraph backend selection is shared with the FraudDetectionMemgraph project
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'FraudDetectionMemgraph'))
+from memgraphBackend import memgraph_factory
 
 fake = Faker()
 
+# Default number of invoices to generate for the same user
+num_invoices = 5
+
+# Invoices are scored, appended to the CSV and sent to Memgraph in batches: a
+# batch is flushed once it holds batch_size invoices or flush_interval seconds
+# have passed since the previous flush
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# One transaction per batch: the uploading user is upserted once, then every
+# invoice of the batch is upserted with its relationships. Nodes are merged on
+# their natural keys (unique, see memgraphSchema.py) and the other properties
+# are set, like the upserts of Memgraph.py
+INVOICE_BATCH_QUERY = """
+MERGE (u:User {VATNumber: $vat_number})
+SET u.userName = $user_name, u.email = $email, u.phoneNumber = $phone_number, u.registrationDate = $registration_date
+WITH u
+UNWIND $rows AS row
+MERGE (i:Invoice {invoiceID: row.invoice_id})
+SET i.invoiceDate = row.invoice_date, i.totalAmount = row.total_amount, i.supplierIBAN = row.supplier_iban, i.status = row.status, i.dueDate = row.due_date, i.supplierTAXID = row.supplier_tax_id, i.fraud = row.fraud_label
+MERGE (u2:User {VATNumber: row.supplier_tax_id})
+MERGE (u)-[:UPLOADED_BY]->(i)
+MERGE (i)-[:NEEDS_PAYMENT_FROM]->(u2)
+"""
+
 # Function to generate a unique VAT ID
 def generate_unique_vat_id(used_vat_numbers):
     while True:
@@ -18,123 +49,138 @@ def generate_unique_vat_id(used_vat_numbers):
             used_vat_numbers.add(vat_id)
             return vat_id
 
-# Load the pre-trained model
-model = joblib.load('fraud_detection_model.pkl')
-
-# Load the label encoder for the status
-label_encoder = LabelEncoder()
-label_encoder.fit(['paid', 'pending', 'overdue'])  # You can adjust according to possible statuses
-
-# Define the number of invoices to generate
-num_invoices = 5  # Adjust the number of fraudulent invoices you want to create for the same user
-
-# Generate a set of VAT numbers (for supplier)
-used_vat_numbers = set()
-
 # Generate a user for whom invoices will be uploaded
-user_name = fake.name()
-email = fake.unique.email()
-phone_number = fake.phone_number()
-registration_date = fake.date_this_decade().strftime('%Y-%m-%d %H:%M:%S')
-
-# Generate a unique VAT ID for the user
-vat_number = generate_unique_vat_id(used_vat_numbers)
-
-# Add the user to the CSV and Memgraph in the next steps
-file_path = r'C:\Users\filip\Desktop\S4_DTA\Memgraph_ML\invoice_with_fraud2.csv'
-
-# Connect to Memgraph
-memgraph = Memgraph("127.0.0.1", 7687)
-
-# Add the user to Memgraph (only once)
-memgraph.execute("""
-    MERGE (u:User {VATNumber: $vat_number, userName: $user_name, email: $email, phoneNumber: $phone_number, registrationDate: $registration_date})
-""", parameters={
-    'vat_number': vat_number,
-    'user_name': user_name,
-    'email': email,
-    'phone_number': phone_number,
-    'registration_date': registration_date
-})
-
-# Generate and process each invoice
-for _ in range(num_invoices):
-    # Generate invoice details
-    invoice_id = random.randint(1000, 9999)
-    invoice_date = fake.date_this_year().strftime('%Y-%m-%d %H:%M:%S')
-    total_amount = random.randint(100000, 5000000)  # A very high amount to simulate a fraudulent invoice
-    supplier_iban = fake.iban()
-    status = random.choice(['paid', 'pending', 'overdue'])
-    due_date = fake.date_this_year().strftime('%Y-%m-%d %H:%M:%S')
-    supplier_tax_id = generate_unique_vat_id(used_vat_numbers)
-
-    # Create a dictionary with the invoice details
-    new_invoice = {
-        'invoice_id': invoice_id,
-        'user_name': user_name,
-        'email': email,
-        'phone_number': phone_number,
-        'registration_date': registration_date,
-        'vat_number': vat_number,
-        'invoice_date': invoice_date,
-        'total_amount': total_amount,
-        'supplier_iban': supplier_iban,
-        'status': status,
-        'due_date': due_date,
-        'supplier_tax_id': supplier_tax_id
+def generate_user(used_vat_numbers):
+    return {
+        'user_name': fake.name(),
+        'email': fake.unique.email(),
+        'phone_number': fake.phone_number(),
+        'registration_date': fake.date_this_decade().strftime('%Y-%m-%d %H:%M:%S'),
+        'vat_number': generate_unique_vat_id(used_vat_numbers),
     }
 
-    # Convert invoice data for prediction
-    new_invoice_data = pd.DataFrame([{
-        'total_amount': total_amount,
-        'status': label_encoder.transform([status])[0],
-        'due_date': pd.to_datetime(due_date).timestamp()
-    }])
-
-    # Convert data to DMatrix format for XGBoost
-    new_data = xgb.DMatrix(new_invoice_data)
-
-    # Predict whether the invoice is fraudulent
-    prediction = model.predict(new_data)
-
-    # Display prediction result
-    fraud_label = 1 if prediction[0] > 0.5 else 0
-    if fraud_label == 1:
-        print(f"The invoice {invoice_id} is fraudulent (High amount).")
-    else:
-        print(f"The invoice {invoice_id} is legitimate.")
-
-    # Add the invoice to the CSV file
-    with open(file_path, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([invoice_id, user_name, email, phone_number, registration_date, vat_number,
-                         invoice_id, user_name, invoice_date, total_amount, supplier_iban, status, due_date, supplier_tax_id, fraud_label])
-
-    print(f"Invoice {invoice_id} added to the CSV file at {file_path}.")
-
-    # Add the invoice and relationships to Memgraph
-    memgraph.execute("""
-        MERGE (i:Invoice {invoiceID: $invoice_id, invoiceDate: $invoice_date, totalAmount: $total_amount, supplierIBAN: $supplier_iban, status: $status, dueDate: $due_date, supplierTAXID: $supplier_tax_id, fraud: $fraud_label}) 
-        MERGE (u:User {VATNumber: $vat_number, userName: $user_name, email: $email, phoneNumber: $phone_number, registrationDate: $registration_date}) 
-        MERGE (u2:User {VATNumber: $supplier_tax_id}) 
-        MERGE (u)-[:UPLOADED_BY]->(i) 
-        MERGE (i)-[:NEEDS_PAYMENT_FROM]->(u2) 
-    """, parameters={ 
-        'vat_number': vat_number, 
-        'user_name': user_name, 
-        'email': email, 
-        'phone_number': phone_number, 
-        'registration_date': registration_date, 
-        'invoice_id': invoice_id, 
-        'invoice_date': invoice_date, 
-        'total_amount': total_amount, 
-        'supplier_iban': supplier_iban, 
-        'status': status, 
-        'due_date': due_date, 
-        'supplier_tax_id': supplier_tax_id, 
-        'fraud_label': fraud_label 
-    })
-
-    print(f"Invoice {invoice_id} and its relationships added to Memgraph.")
-
-print("All invoices uploaded to Memgraph.")
+# Invoice IDs continue after the largest one already in the CSV the invoices are
+# appended to, so they never repeat within a batch or across runs
+def invoice_id_sequence(csv_path):
+    last_id = 0
+    if os.path.exists(csv_path):
+        with open(csv_path, mode='r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                if row.get('invoice_id'):
+                    last_id = max(last_id, int(row['invoice_id']))
+    return itertools.count(last_id + 1)
+
+# Generate invoice details
+def generate_invoice(used_vat_numbers, invoice_ids):
+    return {
+        'invoice_id': next(invoice_ids),
+        'invoice_date': fake.date_this_year().strftime('%Y-%m-%d %H:%M:%S'),
+        'total_amount': random.randint(100000, 5000000),  # A very high amount to simulate a fraudulent invoice
+        'supplier_iban': fake.iban(),
+        'status': random.choice(['paid', 'pending', 'overdue']),
+        'due_date': fake.date_this_year().strftime('%Y-%m-%d %H:%M:%S'),
+        'supplier_tax_id': generate_unique_vat_id(used_vat_numbers),
+    }
+
+
+# Collects generated invoices for one user and persists them batch by batch:
+# one predict call, one buffered CSV write and one Memgraph transaction per batch
+class InvoiceBatchWriter:
+    def __init__(self, model, memgraph, csv_file, user, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.model = model
+        self.memgraph = memgraph
+        self.csv_file = csv_file
+        self.writer = csv.writer(csv_file)
+        self.user = user
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.last_flush = time.monotonic()
+        self.invoices = 0
+        self.fraudulent = 0
+        self.batches = 0
+        self.seconds = {'score': 0.0, 'csv': 0.0, 'memgraph': 0.0}
+
+    def add(self, invoice):
+        self.pending.append(invoice)
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        user = self.user
+
+        # Score the whole batch with one predict call
+        start = time.perf_counter()
+        labels = self.model.labels(self.model.predict({
+            'total_amount': [invoice['total_amount'] for invoice in batch],
+            'status': [invoice['status'] for invoice in batch],
+            'due_date': [invoice['due_date'] for invoice in batch],
+        })).tolist()
+        for invoice, label in zip(batch, labels):
+            invoice['fraud_label'] = label
+        scored = time.perf_counter()
+
+        # Append the batch to the CSV file
+        self.writer.writerows(
+            [invoice['invoice_id'], user['user_name'], user['email'], user['phone_number'], user['registration_date'], user['vat_number'],
+             invoice['invoice_id'], user['user_name'], invoice['invoice_date'], invoice['total_amount'], invoice['supplier_iban'],
+             invoice['status'], invoice['due_date'], invoice['supplier_tax_id'], invoice['fraud_label']]
+            for invoice in batch
+        )
+        self.csv_file.flush()
+        written = time.perf_counter()
+
+        # Add the invoices and relationships to Memgraph
+        self.memgraph.execute(INVOICE_BATCH_QUERY, dict(user, rows=batch))
+        stored = time.perf_counter()
+
+        self.seconds['score'] += scored - start
+        self.seconds['csv'] += written - scored
+        self.seconds['memgraph'] += stored - written
+        self.invoices += len(batch)
+        self.fraudulent += sum(labels)
+        self.batches += 1
+        print(f"Batch {self.batches}: {len(batch)} invoices ({sum(labels)} fraudulent) added to the CSV file and Memgraph.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate, score and store invoices for one user")
+    parser.add_argument('--invoices', type=int, default=num_invoices, help="Number of invoices to generate")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Invoices per CSV write and Memgraph transaction")
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL, help="Maximum seconds between flushes")
+    parser.add_argument('--csv', default=os.path.join(BASE_DIR, 'invoice_with_fraud2.csv'), help="CSV file the invoices are appended to")
+    args = parser.parse_args()
+
+    # Load the pre-trained model; its manifest carries the feature encoding and
+    # threshold, so statuses and dates are encoded exactly as during training
+    model = load_model()
+
+    # Generate a set of VAT numbers (for supplier)
+    used_vat_numbers = set()
+    user = generate_user(used_vat_numbers)
+    invoice_ids = invoice_id_sequence(args.csv)
+
+    # Connect to Memgraph (or the stand-in selected by MEMGRAPH_BACKEND)
+    connect = memgraph_factory()
+    memgraph = connect()
+
+    start = time.perf_counter()
+    with open(args.csv, mode='a', newline='') as file:
+        batch_writer = InvoiceBatchWriter(model, memgraph, file, user, args.batch_size, args.flush_interval)
+        for _ in range(args.invoices):
+            batch_writer.add(generate_invoice(used_vat_numbers, invoice_ids))
+        batch_writer.flush()
+    seconds = time.perf_counter() - start
+
+    print(f"All {batch_writer.invoices} invoices ({batch_writer.fraudulent} fraudulent) uploaded to Memgraph "
+          f"in {batch_writer.batches} batches.")
+    print(f"Throughput: {batch_writer.invoices / seconds:.1f} invoices/sec over {seconds:.2f}s "
+          f"(score {batch_writer.seconds['score']:.2f}s, CSV {batch_writer.seconds['csv']:.2f}s, "
+          f"Memgraph {batch_writer.seconds['memgraph']:.2f}s)")
+    if connect.recorder:
+        summary = connect.recorder.summary()
+        print(f"Memgraph round trips: {summary['round_trips']} ({summary['rows']} rows sent)")
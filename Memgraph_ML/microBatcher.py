@@ -0,0 +1,129 @@
+import time
+import queue
+import logging
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Rolling window of latencies (in seconds) for percentile reporting
+class LatencyStats:
+    def __init__(self, window=10000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            samples = np.array(self._samples)
+            count = self.count
+        if samples.size == 0:
+            return {'count': count, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        return {
+            'count': count,
+            'p50_ms': round(float(p50), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(samples.max()) * 1000, 3),
+        }
+
+
+# Collects items submitted from many threads and hands them to predict_fn in
+# batches: a batch is flushed when it holds max_batch_size items or when its
+# first item has waited max_wait seconds. predict_fn receives a list of items
+# and must return one result per item, in order.
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=64, max_wait=0.005):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batch_sizes = Counter()
+        self.batch_latency = LatencyStats()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    # Blocking helper for request handlers
+    def predict(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            sizes = dict(sorted(self.batch_sizes.items()))
+        batches = sum(sizes.values())
+        items = sum(size * count for size, count in sizes.items())
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': batches,
+            'items': items,
+            'avg_batch_size': round(items / batches, 2) if batches else 0.0,
+            'batch_size_histogram': sizes,
+            'batch_latency': self.batch_latency.summary(),
+        }
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                # Finish the current batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Skip requests whose caller gave up (cancelled after a timeout)
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = self.predict_fn(items)
+            except Exception as e:
+                logger.exception(f"Prediction failed for a batch of {len(items)}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batch_latency.add(time.perf_counter() - start)
+            with self._lock:
+                self.batch_sizes[len(items)] += 1
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
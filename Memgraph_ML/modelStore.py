@@ -0,0 +1,160 @@
+# Models are saved in XGBoost's native UBJSON format (portable across XGBoost
+# versions, no pickle) with a JSON manifest next to them holding everything
+# scoring needs besides the trees: feature names and dtypes, the status map,
+# the decision threshold and hashes of the model and its training data.
+#
+#   python modelStore.py --convert fraud_detection_model.pkl --training-data invoice_with_fraud2.csv
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import xgboost as xgb
+
+from features import BASE_DIR, FeatureTransformer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.join(BASE_DIR, 'fraud_detection_model.ubj')
+DEFAULT_THRESHOLD = 0.5
+MANIFEST_VERSION = 1
+
+
+class ModelManifestError(ValueError):
+    pass
+
+
+# fraud_detection_model.ubj -> fraud_detection_model.manifest.json
+def manifest_path(model_path):
+    return os.path.splitext(model_path)[0] + '.manifest.json'
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Booster plus the manifest it was saved with
+class FraudModel:
+    def __init__(self, booster, manifest):
+        self.booster = booster
+        self.manifest = manifest
+        self.transformer = FeatureTransformer.from_dict(manifest)
+        self.threshold = manifest['threshold']
+
+    # Fraud probabilities for a DataFrame or dict of columns
+    def predict(self, data):
+        return self.booster.inplace_predict(self.transformer.transform(data), validate_features=False)
+
+    def labels(self, probabilities):
+        return (probabilities > self.threshold).astype(int)
+
+
+def save_model(booster, model_path=DEFAULT_MODEL_PATH, transformer=None, threshold=DEFAULT_THRESHOLD,
+               training_data_path=None):
+    transformer = transformer or FeatureTransformer()
+    if booster.feature_names is None:
+        booster.feature_names = transformer.feature_names
+    booster.save_model(model_path)
+
+    manifest = dict(
+        transformer.to_dict(),
+        version=MANIFEST_VERSION,
+        model_file=os.path.basename(model_path),
+        model_sha256=file_sha256(model_path),
+        xgboost_version=xgb.__version__,
+        num_features=booster.num_features(),
+        threshold=threshold,
+        training_data_sha256=file_sha256(training_data_path) if training_data_path else None,
+        created_at=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    )
+    with open(manifest_path(model_path), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def read_manifest(model_path):
+    path = manifest_path(model_path)
+    if not os.path.exists(path):
+        raise ModelManifestError(f"No manifest found for {model_path} (expected {path})")
+    with open(path, 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ModelManifestError(f"Unsupported manifest version {manifest.get('version')} in {path}")
+    return manifest
+
+
+# Model files whose hash already matched their manifest, keyed by
+# (path, mtime, size, expected hash), so that reloads skip the full read
+_verified = set()
+_verified_lock = threading.Lock()
+
+
+def verify_model_file(model_path, expected_sha256):
+    stat = os.stat(model_path)
+    key = (os.path.realpath(model_path), stat.st_mtime_ns, stat.st_size, expected_sha256)
+    with _verified_lock:
+        if key in _verified:
+            return
+    if file_sha256(model_path) != expected_sha256:
+        raise ModelManifestError(f"{model_path} does not match the hash in its manifest")
+    with _verified_lock:
+        _verified.add(key)
+
+
+# XGBoost reads the model file itself. The features are always checked against
+# the manifest; with verify the file is also hashed (once per mtime and size),
+# which reads the whole file and adds to the cold start of large models.
+def load_model(model_path=DEFAULT_MODEL_PATH, nthread=None, verify=False):
+    manifest = read_manifest(model_path)
+
+    if verify:
+        verify_model_file(model_path, manifest['model_sha256'])
+    booster = xgb.Booster()
+    booster.load_model(model_path)
+
+    if booster.feature_names is not None and list(booster.feature_names) != manifest['feature_names']:
+        raise ModelManifestError(
+            f"Model features {booster.feature_names} do not match the manifest {manifest['feature_names']}"
+        )
+    if booster.num_features() != len(manifest['feature_names']):
+        raise ModelManifestError(
+            f"Model expects {booster.num_features()} features, the manifest lists {len(manifest['feature_names'])}"
+        )
+    if manifest['xgboost_version'] != xgb.__version__:
+        logger.info(f"Model saved with XGBoost {manifest['xgboost_version']}, loaded with {xgb.__version__}")
+
+    if nthread is not None:
+        booster.set_param({'nthread': nthread})
+    return FraudModel(booster, manifest)
+
+
+# One-off migration of a joblib-pickled booster to the native format
+def convert_pickle(pickle_path, model_path=DEFAULT_MODEL_PATH, threshold=DEFAULT_THRESHOLD, training_data_path=None):
+    import joblib
+
+    booster = joblib.load(pickle_path)
+    return save_model(booster, model_path, FeatureTransformer(), threshold, training_data_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert or inspect saved fraud detection models")
+    parser.add_argument('--convert', metavar='PICKLE', help="joblib-pickled booster to convert to the native format")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Native model path (.ubj or .json)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--training-data', help="CSV the model was trained on, hashed into the manifest")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.convert:
+        convert_pickle(args.convert, args.model, args.threshold, args.training_data)
+        print(f"Saved {args.model} and {manifest_path(args.model)}")
+
+    model = load_model(args.model, verify=True)
+    print(json.dumps(model.manifest, indent=2))
@@ -0,0 +1,133 @@
+# Long-lived scoring service: the booster and feature transformer are loaded
+# and warmed up once, and concurrent /score requests are merged into
+# micro-batches scored with a single inplace_predict call.
+#
+#   SCORING_MAX_BATCH_SIZE=128 SCORING_MAX_WAIT_MS=5 python scoringServer.py
+import os
+import math
+import time
+import logging
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+from flask import Flask, jsonify, request
+
+from modelStore import DEFAULT_MODEL_PATH, load_model
+from microBatcher import LatencyStats, MicroBatcher
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = Flask(__name__)
+
+app.config['MODEL_PATH'] = os.environ.get('MODEL_PATH', DEFAULT_MODEL_PATH)
+app.config['SCORING_MAX_BATCH_SIZE'] = int(os.environ.get('SCORING_MAX_BATCH_SIZE', 64))
+app.config['SCORING_MAX_WAIT_MS'] = float(os.environ.get('SCORING_MAX_WAIT_MS', 5.0))
+app.config['SCORING_NTHREAD'] = int(os.environ['SCORING_NTHREAD']) if 'SCORING_NTHREAD' in os.environ else None
+app.config['SCORING_TIMEOUT'] = float(os.environ.get('SCORING_TIMEOUT', 10.0))
+# MODEL_VERIFY=1 checks the model file against the SHA-256 in its manifest at startup
+app.config['MODEL_VERIFY'] = os.environ.get('MODEL_VERIFY', '0') == '1'
+
+REQUIRED_FIELDS = ['total_amount', 'status', 'due_date']
+
+start = time.perf_counter()
+model = load_model(app.config['MODEL_PATH'], app.config['SCORING_NTHREAD'], verify=app.config['MODEL_VERIFY'])
+transformer = model.transformer
+logger.info(f"Loaded model {app.config['MODEL_PATH']} in {time.perf_counter() - start:.3f}s")
+
+# Decision threshold from the model manifest unless overridden
+app.config['SCORING_THRESHOLD'] = float(os.environ.get('SCORING_THRESHOLD', model.threshold))
+
+
+# Score a list of invoice dicts in one call
+def predict_batch(invoices):
+    columns = {field: [invoice[field] for invoice in invoices] for field in REQUIRED_FIELDS}
+    return model.predict(columns).tolist()
+
+
+# A few predictions of every batch size class so the first requests do not
+# pay for lazy initialisation inside XGBoost
+def warm_up(max_batch_size):
+    sample = {'total_amount': 100.0, 'status': next(iter(transformer.status_map)), 'due_date': 1735689600}
+    size = 1
+    while size <= max_batch_size:
+        predict_batch([sample] * size)
+        size *= 2
+
+
+warm_up(app.config['SCORING_MAX_BATCH_SIZE'])
+
+batcher = MicroBatcher(
+    predict_batch,
+    max_batch_size=app.config['SCORING_MAX_BATCH_SIZE'],
+    max_wait=app.config['SCORING_MAX_WAIT_MS'] / 1000,
+)
+request_latency = LatencyStats()
+
+
+# Checks done in the request thread so one bad invoice cannot fail a whole batch
+def validate_invoice(data):
+    if not isinstance(data, dict):
+        return None, "Expected a JSON object"
+    missing = [field for field in REQUIRED_FIELDS if data.get(field) in (None, '')]
+    if missing:
+        return None, f"Missing fields: {', '.join(missing)}"
+    if not isinstance(data['status'], str) or data['status'] not in transformer.status_map:
+        return None, f"Unknown status: {data['status']}"
+    # due_date becomes epoch seconds here, so a batch never has to agree on one date format
+    try:
+        if not isinstance(data['due_date'], str):
+            raise TypeError(data['due_date'])
+        due_date = np.datetime64(data['due_date'], 's')
+        if np.isnat(due_date):
+            raise ValueError(data['due_date'])
+        invoice = {'total_amount': float(data['total_amount']), 'status': data['status'],
+                   'due_date': int(due_date.astype(np.int64))}
+    except (TypeError, ValueError, OverflowError):
+        return None, "Invalid total_amount or due_date"
+    if not math.isfinite(invoice['total_amount']):
+        return None, "Invalid total_amount or due_date"
+    return invoice, None
+
+
+@app.route('/score', methods=['POST'])
+def score():
+    start = time.perf_counter()
+    data = request.get_json(silent=True)
+    invoice, error = validate_invoice(data)
+    if error:
+        return jsonify({'error': error}), 400
+
+    future = batcher.submit(invoice)
+    try:
+        probability = future.result(app.config['SCORING_TIMEOUT'])
+    except FutureTimeoutError:
+        # Dropped from its batch if it has not been picked up yet
+        future.cancel()
+        logger.warning(f"Scoring timed out after {app.config['SCORING_TIMEOUT']}s")
+        return jsonify({'error': 'Scoring timed out, try again later'}), 503
+    except Exception as e:
+        # The whole micro-batch failed; every request in it gets the same error
+        logger.exception(f"Scoring failed: {e}")
+        return jsonify({'error': 'Scoring failed'}), 500
+    request_latency.add(time.perf_counter() - start)
+    return jsonify({
+        'invoice_id': data.get('invoice_id'),
+        'probability': probability,
+        'label': int(probability > app.config['SCORING_THRESHOLD']),
+    })
+
+
+@app.route('/stats')
+def stats():
+    return jsonify({'request_latency': request_latency.summary(), 'batching': batcher.stats()})
+
+
+@app.route('/health')
+def health():
+    return jsonify({'status': 'ok', 'model': app.config['MODEL_PATH']})
+
+
+if __name__ == '__main__':
+    app.run(host=os.environ.get('SCORING_HOST', '127.0.0.1'), port=int(os.environ.get('SCORING_PORT', 5001)), threaded=True)
@@ -0,0 +1,127 @@
+import logging
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# What detect_fraud() in main.py runs: every call aggregates the whole graph
+FULL_AGGREGATION_QUERY = """
+MATCH (d:Driver)-[:SENT]->(:Invoice)-[:PAID_INTO]->(b:Bank)
+WITH b.iban AS iban, collect(DISTINCT d.name) AS drivers, count(DISTINCT d.name) AS nb
+WHERE nb > $threshold
+RETURN iban, drivers, nb
+"""
+
+SENT_EDGES_QUERY = "MATCH (d:Driver)-[:SENT]->(i:Invoice) RETURN d.name AS driver, i.invoice_id AS invoice"
+PAID_INTO_EDGES_QUERY = "MATCH (i:Invoice)-[:PAID_INTO]->(b:Bank) RETURN i.invoice_id AS invoice, b.iban AS iban"
+
+CREATE_SENT_QUERY = """
+MATCH (d:Driver {name: $driver}), (i:Invoice {invoice_id: $invoice})
+CREATE (d)-[:SENT]->(i)
+RETURN count(*) AS created
+"""
+
+CREATE_PAID_INTO_QUERY = """
+MATCH (i:Invoice {invoice_id: $invoice}), (b:Bank {iban: $iban})
+CREATE (i)-[:PAID_INTO]->(b)
+RETURN count(*) AS created
+"""
+
+
+def log_alert(iban, drivers):
+    logger.warning(f"IBAN {iban} shared by {len(drivers)} drivers: {drivers}")
+
+
+# Distinct drivers per IBAN along (:Driver)-[:SENT]->(:Invoice)-[:PAID_INTO]->(:Bank),
+# kept up to date edge by edge instead of re-aggregating the graph. An IBAN is an
+# offender while more than threshold drivers pay into it (the WHERE nb > threshold
+# of detect_fraud()); on_alert(iban, drivers) is called when it crosses the threshold.
+# An edge costs O(drivers or IBANs of its invoice), usually 1.
+class IbanSharingIndex:
+    def __init__(self, threshold=2, on_alert=log_alert):
+        self.threshold = threshold
+        self.on_alert = on_alert
+        self._senders = defaultdict(set)  # invoice -> driver names
+        self._ibans = defaultdict(set)  # invoice -> IBANs
+        self._drivers = defaultdict(Counter)  # IBAN -> driver name -> invoices linking them
+        self._offenders = set()
+
+    def add_sent(self, driver, invoice):
+        if driver in self._senders[invoice]:
+            return
+        self._senders[invoice].add(driver)
+        for iban in self._ibans[invoice]:
+            self._link(iban, driver)
+
+    def add_paid_into(self, invoice, iban):
+        if iban in self._ibans[invoice]:
+            return
+        self._ibans[invoice].add(iban)
+        for driver in self._senders[invoice]:
+            self._link(iban, driver)
+
+    def remove_sent(self, driver, invoice):
+        if driver not in self._senders.get(invoice, ()):
+            return
+        self._senders[invoice].discard(driver)
+        for iban in self._ibans.get(invoice, ()):
+            self._unlink(iban, driver)
+
+    def remove_paid_into(self, invoice, iban):
+        if iban not in self._ibans.get(invoice, ()):
+            return
+        self._ibans[invoice].discard(iban)
+        for driver in self._senders.get(invoice, ()):
+            self._unlink(iban, driver)
+
+    def drivers(self, iban):
+        return sorted(self._drivers.get(iban, ()))
+
+    # Current offenders, as the rows of FULL_AGGREGATION_QUERY; O(offenders), not O(graph)
+    def offenders(self):
+        return [{'iban': iban, 'drivers': self.drivers(iban), 'nb': len(self._drivers[iban])} for iban in self._offenders]
+
+    def _link(self, iban, driver):
+        drivers = self._drivers[iban]
+        drivers[driver] += 1
+        if drivers[driver] == 1 and len(drivers) == self.threshold + 1:
+            self._offenders.add(iban)
+            if self.on_alert:
+                self.on_alert(iban, sorted(drivers))
+
+    def _unlink(self, iban, driver):
+        drivers = self._drivers[iban]
+        drivers[driver] -= 1
+        if drivers[driver] == 0:
+            del drivers[driver]
+            if len(drivers) == self.threshold:
+                self._offenders.discard(iban)
+            if not drivers:
+                del self._drivers[iban]
+
+
+# Build the index from the edges already in the graph (two scans, once). IBANs
+# that are already offenders do not raise alerts; on_alert applies from then on.
+def load_index(memgraph, threshold=2, on_alert=log_alert):
+    index = IbanSharingIndex(threshold, on_alert=None)
+    for row in memgraph.execute_and_fetch(SENT_EDGES_QUERY):
+        index.add_sent(row['driver'], row['invoice'])
+    for row in memgraph.execute_and_fetch(PAID_INTO_EDGES_QUERY):
+        index.add_paid_into(row['invoice'], row['iban'])
+    index.on_alert = on_alert
+    logger.info(f"Loaded the IBAN index: {len(index.offenders())} IBANs shared by more than {threshold} drivers")
+    return index
+
+
+# Create the edge in Memgraph, then update the index with what was actually created
+def create_sent(memgraph, index, driver, invoice):
+    created = next(memgraph.execute_and_fetch(CREATE_SENT_QUERY, {'driver': driver, 'invoice': invoice}), {}).get('created', 0)
+    if created:
+        index.add_sent(driver, invoice)
+    return created
+
+
+def create_paid_into(memgraph, index, invoice, iban):
+    created = next(memgraph.execute_and_fetch(CREATE_PAID_INTO_QUERY, {'invoice': invoice, 'iban': iban}), {}).get('created', 0)
+    if created:
+        index.add_paid_into(invoice, iban)
+    return created
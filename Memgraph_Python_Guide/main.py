@@ -1,5 +1,6 @@
 
 from gqlalchemy import Memgraph, create, match
+from ibanIndex import create_paid_into, create_sent, load_index
 
 # Connect to Memgraph
 memgraph = Memgraph(host="127.0.0.1", port=7687)
@@ -103,3 +104,25 @@ results = memgraph.execute_and_fetch("MATCH (d:Driver {id: 'TEMP123'}) RETURN d"
 print("🗑 After delete (should be empty):", list(results))
 
 print("✅ Exercise 6 complete.")
+
+# --------------------------
+# EXERCISE 7 – Incremental Fraud Detection
+# --------------------------
+# detect_fraud() aggregates the whole graph on every call. The index is built
+# once, then updated as each SENT / PAID_INTO edge is created, and alerts as soon
+# as an IBAN is shared by more than 2 drivers.
+def alert(iban, drivers):
+    print(f"🚨 IBAN {iban} is now shared by {len(drivers)} drivers: {drivers}")
+
+fraud_index = load_index(memgraph, threshold=2, on_alert=alert)
+print("📦 Exercise 7 - Offenders before:", fraud_index.offenders())
+
+memgraph.execute("CREATE (:Driver {name: 'Copycat', id: 'D005'})")
+memgraph.execute("CREATE (:Invoice {invoice_id: 'F004', amount: 9900})")
+create_sent(memgraph, fraud_index, 'Copycat', 'F004')
+create_paid_into(memgraph, fraud_index, 'F004', 'CH93-0000-0000-0000-0001')
+
+print("📦 Offenders after:", fraud_index.offenders())
+print("📦 detect_fraud() agrees:", detect_fraud())
+
+print("✅ Exercise 7 complete.")
@@ -0,0 +1,71 @@
+# Incremental vs. full node2vec for a small upload on top of a large existing
+# graph. Needs a running Memgraph (MAGE) instance; the database is wiped.
+# Invoice and user IDs of the upload CSV must not overlap the base CSV.
+#
+#   python benchmarks/bench_embeddings.py --base big.csv --upload small.csv
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'FraudDetectionMemgraph'))
+
+from bulkLoader import load_invoice_csv, to_int
+from embeddings import DEFAULT_HOPS, set_full_embeddings, set_incremental_embeddings
+from memgraphBackend import memgraph_factory
+from memgraphSchema import ensure_schema
+
+
+def count_nodes(memgraph):
+    return next(memgraph.execute_and_fetch("MATCH (n) RETURN count(n) AS nodes;"))['nodes']
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return time.perf_counter() - start, value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare incremental and full node2vec recompute")
+    parser.add_argument('--host', help="Memgraph host (default: MEMGRAPH_HOST or 127.0.0.1)")
+    parser.add_argument('--port', type=int, help="Memgraph port (default: MEMGRAPH_PORT or 7687)")
+    parser.add_argument('--base', required=True, help="CSV used to build the existing graph")
+    parser.add_argument('--upload', required=True, help="CSV of the small upload")
+    parser.add_argument('--hops', type=int, default=DEFAULT_HOPS)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    memgraph = memgraph_factory(args.host, args.port)()
+    memgraph.drop_database()
+    ensure_schema(memgraph)
+
+    load_invoice_csv(memgraph, args.base)
+    base_seconds, _ = timed(set_full_embeddings, memgraph)
+    base_nodes = count_nodes(memgraph)
+
+    load_invoice_csv(memgraph, args.upload)
+    with open(args.upload, mode='r', newline='', encoding='utf-8') as file:
+        upload_ids = [to_int(row['invoice_id']) for row in csv.DictReader(file)]
+    incremental_seconds, updated = timed(set_incremental_embeddings, memgraph, upload_ids, args.hops)
+    full_seconds, _ = timed(set_full_embeddings, memgraph)
+
+    results = {
+        'existing_nodes': base_nodes,
+        'new_nodes': count_nodes(memgraph) - base_nodes,
+        'hops': args.hops,
+        'initial_full_seconds': round(base_seconds, 3),
+        'incremental_seconds': round(incremental_seconds, 3),
+        'incremental_embedded_nodes': updated,
+        'full_seconds': round(full_seconds, 3),
+    }
+    print(json.dumps(results, indent=2))
+    if incremental_seconds > 0:
+        print(f"Incremental is {full_seconds / incremental_seconds:.1f}x faster than a full recompute")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
@@ -0,0 +1,63 @@
+# Generation time of Memgraph_ML/fakeData.py for growing invoice counts. With
+# per-user running sums the cost per invoice should stay roughly constant; the
+# script exits with status 1 when the time per invoice at the largest size is
+# more than --tolerance times the one at the smallest size.
+#
+#   python benchmarks/bench_fake_data.py --sizes 10000 100000 1000000
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Memgraph_ML'))
+
+import fakeData
+
+
+def measure(num_users, num_invoices, seed):
+    fakeData.random.seed(seed)
+    fakeData.fake.seed_instance(seed)
+    fakeData.fake.unique.clear()
+    fakeData.used_vat_numbers.clear()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        rows = fakeData.generate_dataset(num_users, num_invoices, os.path.join(directory, 'invoices.csv'))
+        seconds = time.perf_counter() - start
+
+    return {
+        'invoices': rows,
+        'seconds': round(seconds, 3),
+        'microseconds_per_invoice': round(seconds / rows * 1e6, 2),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check that fakeData.py scales linearly with the invoice count")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for size in sorted(args.sizes):
+        result = measure(args.users, size, args.seed)
+        print(f"{size:>10} invoices: {result['seconds']}s ({result['microseconds_per_invoice']} us/invoice)")
+        results.append(result)
+
+    ratio = results[-1]['microseconds_per_invoice'] / results[0]['microseconds_per_invoice']
+    linear = ratio <= args.tolerance
+    summary = {'users': args.users, 'cost_ratio': round(ratio, 2), 'linear': linear, 'runs': results}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=2)
+
+    print(f"Cost per invoice changed by {ratio:.2f}x from {results[0]['invoices']} to {results[-1]['invoices']} invoices")
+    if not linear:
+        sys.exit(1)
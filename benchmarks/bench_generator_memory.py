@@ -0,0 +1,102 @@
+# Peak RSS of datasetcsvGenerator.py for growing invoice counts with a fixed
+# number of users. Each size runs in a fresh process; the script exits with
+# status 1 when the peak at the largest size is more than --tolerance times
+# the peak at the smallest size (plus --slack-mb for allocator noise). The
+# vectorized mode reaches its plateau once a full chunk (WRITE_CHUNK_SIZE
+# invoices) is generated, so the smallest size should be at least one chunk.
+# The repository has no test suite; this script is the regression check for
+# the generator's memory and the first command below runs in seconds.
+#
+#   python benchmarks/bench_generator_memory.py --users 1000 --sizes 100000 400000
+#   python benchmarks/bench_generator_memory.py --mode classic --users 1000 --sizes 20000 80000
+#   python benchmarks/bench_generator_memory.py --mode vectorized --sizes 100000 10000000 100000000
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'FraudDetectionMemgraph'))
+
+
+# ru_maxrss is in KiB on Linux and in bytes on macOS
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# Runs inside the child process and prints its own measurements as JSON
+def run_child(mode, num_users, num_invoices, seed):
+    import datasetcsvGenerator as generator
+
+    baseline_mb = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, 'invoices.csv')
+        start = time.perf_counter()
+        if mode == 'vectorized':
+            rows, _, _ = generator.generate_vectorized(num_users, num_invoices, output_path, seed)
+        else:
+            generator.random.seed(seed)
+            generator.fake.seed_instance(seed)
+            rows, _, _ = generator.generate_classic(num_users, num_invoices, output_path)
+        seconds = time.perf_counter() - start
+        file_mb = os.path.getsize(output_path) / (1024 * 1024)
+
+    print(json.dumps({
+        'invoices': num_invoices,
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'output_mb': round(file_mb, 1),
+        'import_rss_mb': round(baseline_mb, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }))
+
+
+def measure(mode, num_users, num_invoices, seed):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', '--mode', mode,
+         '--users', str(num_users), '--sizes', str(num_invoices), '--seed', str(seed)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check that generator memory does not grow with the invoice count")
+    parser.add_argument('--mode', choices=['classic', 'vectorized'], default='vectorized')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000, 5000000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    parser.add_argument('--slack-mb', type=float, default=50.0)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.mode, args.users, args.sizes[0], args.seed)
+        sys.exit(0)
+
+    results = []
+    for size in sorted(args.sizes):
+        result = measure(args.mode, args.users, size, args.seed)
+        print(f"{size:>12} invoices: peak RSS {result['peak_rss_mb']} MB, "
+              f"{result['seconds']}s, {result['output_mb']} MB written")
+        results.append(result)
+
+    limit_mb = results[0]['peak_rss_mb'] * args.tolerance + args.slack_mb
+    flat = results[-1]['peak_rss_mb'] <= limit_mb
+    summary = {'mode': args.mode, 'users': args.users, 'limit_mb': round(limit_mb, 1), 'flat': flat, 'runs': results}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=2)
+
+    if not flat:
+        print(f"Peak RSS grew from {results[0]['peak_rss_mb']} MB to {results[-1]['peak_rss_mb']} MB (limit {limit_mb:.1f} MB)")
+        sys.exit(1)
+    print(f"Peak RSS stayed within {limit_mb:.1f} MB")
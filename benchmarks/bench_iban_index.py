@@ -0,0 +1,146 @@
+# Shared-IBAN detection as the graph grows: the full aggregation behind
+# detect_fraud() (Memgraph_Python_Guide/main.py) against the incremental index
+# of ibanIndex.py. For each size, all but the last --inserts invoices are
+# loaded, then the remaining ones arrive one by one and offenders are read after
+# each of them. The full aggregation is timed in Python by default, or as the
+# real query on Memgraph with --host (every run wipes the database).
+#
+#   python benchmarks/bench_iban_index.py --sizes 10000 100000 1000000
+#   python benchmarks/bench_iban_index.py --sizes 10000 100000 --host 127.0.0.1
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Memgraph_Python_Guide'))
+
+from ibanIndex import FULL_AGGREGATION_QUERY, IbanSharingIndex
+
+LOAD_QUERY = """
+UNWIND $rows AS row
+MERGE (d:Driver {name: row.driver})
+MERGE (b:Bank {iban: row.iban})
+CREATE (d)-[:SENT]->(:Invoice {invoice_id: row.invoice})-[:PAID_INTO]->(b)
+"""
+
+
+# One (driver, invoice, IBAN) path per invoice. Drivers mostly pay into their own
+# IBAN; share_rate of the invoices go to another driver's, which makes a few offenders.
+def synthetic_paths(num_invoices, seed, share_rate):
+    rng = random.Random(seed)
+    num_drivers = max(1, num_invoices // 10)
+    paths = []
+    for n in range(num_invoices):
+        driver = rng.randrange(num_drivers)
+        iban = rng.randrange(num_drivers) if rng.random() < share_rate else driver
+        paths.append((f"Driver {driver}", f"F{n}", f"IBAN-{iban}"))
+    return paths
+
+
+# What FULL_AGGREGATION_QUERY computes, over every path
+def full_aggregation(paths, threshold):
+    drivers = defaultdict(set)
+    for driver, _, iban in paths:
+        drivers[iban].add(driver)
+    return [{'iban': iban, 'drivers': sorted(names), 'nb': len(names)} for iban, names in drivers.items() if len(names) > threshold]
+
+
+def time_python_aggregation(paths, threshold, runs):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = full_aggregation(paths, threshold)
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def time_memgraph_aggregation(memgraph, paths, threshold, runs, batch_size=10000):
+    memgraph.execute("MATCH (n) DETACH DELETE n")
+    for index in ("CREATE INDEX ON :Driver(name);", "CREATE INDEX ON :Bank(iban);"):
+        memgraph.execute(index)
+    for start in range(0, len(paths), batch_size):
+        rows = [{'driver': driver, 'invoice': invoice, 'iban': iban} for driver, invoice, iban in paths[start:start + batch_size]]
+        memgraph.execute(LOAD_QUERY, {'rows': rows})
+
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = list(memgraph.execute_and_fetch(FULL_AGGREGATION_QUERY, {'threshold': threshold}))
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def measure(num_invoices, inserts, threshold, seed, share_rate, runs, memgraph=None):
+    paths = synthetic_paths(num_invoices, seed, share_rate)
+    loaded, arriving = paths[:-inserts], paths[-inserts:]
+    alerts = []
+    index = IbanSharingIndex(threshold, on_alert=lambda iban, drivers: alerts.append(iban))
+
+    start = time.perf_counter()
+    for driver, invoice, iban in loaded:
+        index.add_sent(driver, invoice)
+        index.add_paid_into(invoice, iban)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for driver, invoice, iban in arriving:
+        index.add_sent(driver, invoice)
+        index.add_paid_into(invoice, iban)
+        offenders = index.offenders()
+    incremental_seconds = (time.perf_counter() - start) / len(arriving)
+
+    if memgraph is None:
+        full_seconds, rows = time_python_aggregation(paths, threshold, runs)
+    else:
+        full_seconds, rows = time_memgraph_aggregation(memgraph, paths, threshold, runs)
+
+    expected = {(row['iban'], row['nb']) for row in rows}
+    if {(row['iban'], row['nb']) for row in offenders} != expected:
+        raise AssertionError(f"Incremental offenders differ from the full aggregation at {num_invoices} invoices")
+
+    return {
+        'invoices': num_invoices,
+        'offenders': len(offenders),
+        'alerts': len(alerts),
+        'index_load_seconds': round(load_seconds, 3),
+        'full_aggregation_ms': round(full_seconds * 1000, 3),
+        'incremental_us_per_insert': round(incremental_seconds * 1e6, 2),
+        'speedup': round(full_seconds / incremental_seconds, 1) if incremental_seconds > 0 else float('inf'),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare full and incremental shared-IBAN detection")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--inserts', type=int, default=1000, help="Invoices arriving one by one after the initial load")
+    parser.add_argument('--threshold', type=int, default=2)
+    parser.add_argument('--share-rate', type=float, default=0.01)
+    parser.add_argument('--runs', type=int, default=3, help="Full aggregation runs (the best one is kept)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--host', help="Time the full aggregation on this Memgraph instance instead of in Python")
+    parser.add_argument('--port', type=int, default=7687)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    memgraph = None
+    if args.host:
+        sys.path.append(os.path.join(ROOT, 'FraudDetectionMemgraph'))
+        from memgraphBackend import memgraph_factory
+        memgraph = memgraph_factory(args.host, args.port)()
+
+    results = []
+    for size in sorted(args.sizes):
+        result = measure(size, min(args.inserts, size), args.threshold, args.seed, args.share_rate, args.runs, memgraph)
+        print(f"{size:>10} invoices: full aggregation {result['full_aggregation_ms']} ms, "
+              f"incremental {result['incremental_us_per_insert']} us/insert ({result['speedup']}x), "
+              f"{result['offenders']} offenders")
+        results.append(result)
+
+    if args.output:
+        summary = {'full_aggregation': 'memgraph' if memgraph else 'python', 'threshold': args.threshold, 'runs': results}
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=2)
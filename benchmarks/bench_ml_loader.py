@@ -0,0 +1,85 @@
+# Previous full-property LOAD CSV loader vs. the key-based upsert loader of
+# Memgraph_ML/Memgraph.py on invoice_with_fraud2.csv: load time, node counts
+# and duplicate User/Invoice keys. Needs a running Memgraph instance; every
+# run wipes the database. --container-csv is the same file as seen by the
+# Memgraph server (LOAD CSV reads it server-side).
+#
+#   python benchmarks/bench_ml_loader.py --container-csv /mnt/data/invoice_with_fraud2.csv
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'FraudDetectionMemgraph'))
+sys.path.append(os.path.join(ROOT, 'Memgraph_ML'))
+
+from memgraphBackend import memgraph_factory
+from memgraphSchema import drop_schema, ensure_schema
+from Memgraph import DEFAULT_BATCH_SIZE, DEFAULT_CSV, DEFAULT_WORKERS, LOAD_QUERY, count_duplicates, load_csv
+
+NODE_COUNT_QUERY = "MATCH (n) RETURN labels(n)[0] AS label, count(n) AS nodes;"
+
+
+def reset(memgraph, constraints):
+    memgraph.drop_database()
+    drop_schema(memgraph)
+    ensure_schema(memgraph, constraints=constraints)
+
+
+def describe(memgraph, seconds):
+    return {
+        'seconds': round(seconds, 3),
+        'nodes': {row['label']: row['nodes'] for row in memgraph.execute_and_fetch(NODE_COUNT_QUERY)},
+        'duplicates': count_duplicates(memgraph),
+    }
+
+
+# Indexes only: the full-property MERGE creates duplicate VATNumbers, which the
+# uniqueness constraint would reject
+def bench_legacy(memgraph, container_csv_path):
+    reset(memgraph, constraints=False)
+    start = time.perf_counter()
+    memgraph.execute(LOAD_QUERY.replace("/mnt/data/invoice_with_fraud2.csv", container_csv_path))
+    return describe(memgraph, time.perf_counter() - start)
+
+
+def bench_upsert(memgraph, connect, csv_path, batch_size, workers):
+    reset(memgraph, constraints=True)
+    start = time.perf_counter()
+    loader = load_csv(connect, csv_path, batch_size, workers)
+    result = describe(memgraph, time.perf_counter() - start)
+    result['retries'] = loader.retries
+    result['stages'] = {stage: round(seconds, 3) for stage, seconds in loader.wall_seconds.items()}
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the full-property and key-based Memgraph_ML loaders")
+    parser.add_argument('--host', help="Memgraph host (default: MEMGRAPH_HOST or 127.0.0.1)")
+    parser.add_argument('--port', type=int, help="Memgraph port (default: MEMGRAPH_PORT or 7687)")
+    parser.add_argument('--csv', default=DEFAULT_CSV, help="CSV read by the upsert loader")
+    parser.add_argument('--container-csv', help="Same CSV as seen by Memgraph, for the LOAD CSV loader (skipped if omitted)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    connect = memgraph_factory(args.host, args.port)
+    memgraph = connect()
+    results = {}
+    if args.container_csv:
+        results['full_property_load_csv'] = bench_legacy(memgraph, args.container_csv)
+    results['key_based_upsert'] = bench_upsert(
+        memgraph, connect, args.csv, args.batch_size, args.workers
+    )
+    print(json.dumps(results, indent=2))
+
+    duplicates = sum(entry['extra_nodes'] for entry in results['key_based_upsert']['duplicates'].values())
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    if duplicates:
+        print(f"Key-based loader left {duplicates} duplicate nodes")
+        sys.exit(1)
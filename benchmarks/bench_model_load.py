@@ -0,0 +1,86 @@
+# Cold-start time of the fraud model: a fresh Python process imports XGBoost,
+# loads the model and scores one invoice. Compares the native UBJSON model
+# (modelStore.load_model) with the same booster pickled by joblib.
+#
+#   python benchmarks/bench_model_load.py --repeat 10
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ML_DIR = os.path.join(ROOT, 'Memgraph_ML')
+
+# Each snippet prints the seconds spent on imports, then on loading the model
+# and scoring the first invoice
+NATIVE_SNIPPET = """
+import time
+start = time.perf_counter()
+from modelStore import load_model
+imported = time.perf_counter()
+model = load_model({model!r})
+model.predict({{'total_amount': [100.0], 'status': ['paid'], 'due_date': ['2025-01-01']}})
+print(imported - start, time.perf_counter() - imported)
+"""
+
+JOBLIB_SNIPPET = """
+import time
+start = time.perf_counter()
+import joblib
+from features import FeatureTransformer
+imported = time.perf_counter()
+model = joblib.load({pickle!r})
+model.inplace_predict(FeatureTransformer().transform({{'total_amount': [100.0], 'status': ['paid'], 'due_date': ['2025-01-01']}}))
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def run(snippet):
+    completed = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', snippet],
+        cwd=ML_DIR, check=True, capture_output=True, text=True,
+    )
+    import_seconds, load_seconds = completed.stdout.strip().splitlines()[-1].split()
+    return float(import_seconds), float(load_seconds)
+
+
+def summarize(samples):
+    imports = [sample[0] for sample in samples]
+    loads = [sample[1] for sample in samples]
+    totals = [sum(sample) for sample in samples]
+    return {
+        'median_total_seconds': round(statistics.median(totals), 4),
+        'median_import_seconds': round(statistics.median(imports), 4),
+        'median_load_seconds': round(statistics.median(loads), 4),
+        'min_load_seconds': round(min(loads), 4),
+        'max_load_seconds': round(max(loads), 4),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare joblib and native XGBoost model cold starts")
+    parser.add_argument('--model', default=os.path.join(ML_DIR, 'fraud_detection_model.ubj'))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    sys.path.append(ML_DIR)
+    import joblib
+    from modelStore import load_model
+
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, 'fraud_detection_model.pkl')
+        joblib.dump(load_model(args.model).booster, pickle_path)
+
+        native = [run(NATIVE_SNIPPET.format(model=os.path.abspath(args.model))) for _ in range(args.repeat)]
+        pickled = [run(JOBLIB_SNIPPET.format(pickle=pickle_path)) for _ in range(args.repeat)]
+
+    results = {'repeat': args.repeat, 'native': summarize(native), 'joblib': summarize(pickled)}
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
@@ -0,0 +1,84 @@
+# Before/after benchmark of the load scripts with and without the indexes and
+# constraints from memgraphSchema.py. Needs a running Memgraph instance; every
+# run wipes the database.
+#
+#   python benchmarks/bench_schema.py --csv FraudDetectionMemgraph/InvoicesFraud.csv
+#   python benchmarks/bench_schema.py --ml-csv /mnt/data/invoice_with_fraud2.csv
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'FraudDetectionMemgraph'))
+sys.path.append(os.path.join(ROOT, 'Memgraph_ML'))
+
+from bulkLoader import DEFAULT_BATCH_SIZE, load_invoice_csv
+from memgraphBackend import memgraph_factory
+from memgraphSchema import drop_schema, ensure_schema
+
+
+def reset(memgraph, with_schema, constraints=True):
+    memgraph.drop_database()
+    drop_schema(memgraph)
+    if with_schema:
+        ensure_schema(memgraph, constraints=constraints)
+
+
+# memgraphLoad.py: bulk UNWIND load of InvoicesFraud.csv
+def bench_fraud_load(memgraph, csv_path, batch_size):
+    results = {}
+    for with_schema in (False, True):
+        reset(memgraph, with_schema)
+        start = time.perf_counter()
+        stats = load_invoice_csv(memgraph, csv_path, batch_size=batch_size)
+        results['with_schema' if with_schema else 'without_schema'] = {
+            'seconds': round(time.perf_counter() - start, 3),
+            'stages': stats.as_dict(),
+        }
+    return results
+
+
+# Memgraph_ML/Memgraph.py: LOAD CSV of invoice_with_fraud2.csv (path as seen by the Memgraph container)
+def bench_ml_load(memgraph, container_csv_path):
+    from Memgraph import LOAD_QUERY
+
+    query = LOAD_QUERY.replace("/mnt/data/invoice_with_fraud2.csv", container_csv_path)
+    results = {}
+    for with_schema in (False, True):
+        reset(memgraph, with_schema, constraints=False)
+        start = time.perf_counter()
+        memgraph.execute(query)
+        results['with_schema' if with_schema else 'without_schema'] = {
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare load times with and without indexes/constraints")
+    parser.add_argument('--host', help="Memgraph host (default: MEMGRAPH_HOST or 127.0.0.1)")
+    parser.add_argument('--port', type=int, help="Memgraph port (default: MEMGRAPH_PORT or 7687)")
+    parser.add_argument('--csv', help="InvoicesFraud.csv as seen by this process")
+    parser.add_argument('--ml-csv', help="invoice_with_fraud2.csv as seen by the Memgraph container")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    memgraph = memgraph_factory(args.host, args.port)()
+    results = {}
+    if args.csv:
+        results['memgraphLoad'] = bench_fraud_load(memgraph, args.csv, args.batch_size)
+    if args.ml_csv:
+        results['Memgraph_ML'] = bench_ml_load(memgraph, args.ml_csv)
+
+    for script, runs in results.items():
+        before = runs['without_schema']['seconds']
+        after = runs['with_schema']['seconds']
+        speedup = before / after if after > 0 else float('inf')
+        print(f"{script}: {before:.2f}s without schema, {after:.2f}s with schema ({speedup:.1f}x)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
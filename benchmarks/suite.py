@@ -0,0 +1,364 @@
+# Benchmark suite for the generation, training, scoring and graph-load paths.
+# Every benchmark is timed over --repeat runs, then run once more under
+# tracemalloc for its peak Python memory. Results, with the commit and package
+# versions they were measured on, are written as JSON so runs can be compared:
+#
+#   python benchmarks/suite.py --output results/before.json
+#   python benchmarks/suite.py --output results/after.json --compare results/before.json
+#
+# Graph-load benchmarks need no Memgraph server: the loaders run against the
+# in-process stand-in of memgraphBackend.py, which counts round trips and batch
+# sizes per query. A benchmark whose dependencies are missing is skipped.
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from collections import OrderedDict
+from importlib import metadata
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'FraudDetectionMemgraph'))
+sys.path.append(os.path.join(ROOT, 'Memgraph_ML'))
+
+ML_CSV = os.path.join(ROOT, 'Memgraph_ML', 'invoice_with_fraud2.csv')
+
+# name -> (component, setup); setup(workdir) returns the function to time,
+# which may return a dict of extra metrics
+BENCHMARKS = OrderedDict()
+
+SIZES = {
+    'generator_vectorized': [10000, 100000, 1000000],
+    'generator_classic': [1000, 10000],
+    'training': [1029, 100000],
+    'scoring_single': 500,
+    'scoring_batch': [10000, 1000000],
+    'cypher': [10000, 100000],
+}
+
+# Simulated Memgraph round-trip latency for the graph-load benchmarks
+LATENCY_MS = 0.0
+
+QUICK_SIZES = {
+    'generator_vectorized': [10000],
+    'generator_classic': [1000],
+    'training': [1029],
+    'scoring_single': 100,
+    'scoring_batch': [10000],
+    'cypher': [10000],
+}
+
+
+def register(name, component, setup):
+    BENCHMARKS[name] = (component, setup)
+
+
+# In-process Memgraph stand-in (memgraphBackend.py) that counts round trips and
+# batch sizes per query; the queries whose results drive the pipeline get
+# plausible rows. Each round trip sleeps --latency-ms.
+def stand_in():
+    import fraudPrediction
+    from embeddings import DEFAULT_HOPS, incremental_query
+    from memgraphBackend import ResponseBook, memgraph_factory
+
+    responses = ResponseBook()
+    responses.respond(fraudPrediction.PREDICT_QUERY, lambda parameters: [{'invoiceID': invoice_id, 'predicted_class': 0} for invoice_id in parameters['ids']])
+    responses.respond(incremental_query(DEFAULT_HOPS), lambda parameters: [{'updated': len(parameters['ids'])}])
+    connect = memgraph_factory(backend='replay', latency_ms=LATENCY_MS, responses=responses)
+    return connect(), connect.recorder
+
+
+# --- datasetcsvGenerator.py ---
+
+def generator_vectorized(num_invoices):
+    def setup(workdir):
+        import datasetcsvGenerator as generator
+
+        path = os.path.join(workdir, f'vectorized_{num_invoices}.csv')
+
+        def run():
+            rows, fraud, _ = generator.generate_vectorized(max(100, num_invoices // 10), num_invoices, path, seed=42)
+            return {'rows': rows, 'fraud': fraud}
+        return run
+    return setup
+
+
+def generator_classic(num_invoices):
+    def setup(workdir):
+        import datasetcsvGenerator as generator
+
+        path = os.path.join(workdir, f'classic_{num_invoices}.csv')
+
+        def run():
+            generator.random.seed(42)
+            generator.fake.seed_instance(42)
+            generator.fake.unique.clear()
+            generator.used_vat_numbers.clear()
+            rows, fraud, _ = generator.generate_classic(max(100, num_invoices // 10), num_invoices, path)
+            return {'rows': rows, 'fraud': fraud}
+        return run
+    return setup
+
+
+# --- Traitment.py ---
+
+# Training data: the committed CSV, or a fakeData.py dataset of the given size
+def training_frame(workdir, num_rows):
+    import pandas as pd
+
+    if num_rows <= 1029:
+        return pd.read_csv(ML_CSV)
+    import fakeData
+
+    fakeData.random.seed(42)
+    fakeData.fake.seed_instance(42)
+    path = os.path.join(workdir, f'training_{num_rows}.csv')
+    fakeData.generate_dataset(max(100, num_rows // 100), num_rows, path)
+    return pd.read_csv(path)
+
+
+def training(num_rows):
+    def setup(workdir):
+        from Traitment import train_model
+
+        data = training_frame(workdir, num_rows)
+
+        def run():
+            model, _, X_test, _ = train_model(data)
+            return {'rows': len(data), 'test_rows': len(X_test)}
+        return run
+    return setup
+
+
+# --- scoring as in main.py / batchScore.py / scoringServer.py ---
+
+def scoring_frame(num_rows):
+    import numpy as np
+    import pandas as pd
+
+    data = pd.read_csv(ML_CSV, usecols=['total_amount', 'status', 'due_date'])
+    return data.iloc[np.arange(num_rows) % len(data)].reset_index(drop=True)
+
+
+# One predict call per invoice, like a request to the scoring service without batching
+def scoring_single(num_invoices):
+    def setup(workdir):
+        from modelStore import load_model
+
+        model = load_model()
+        invoices = scoring_frame(num_invoices).to_dict('records')
+
+        def run():
+            for invoice in invoices:
+                model.predict({'total_amount': [invoice['total_amount']], 'status': [invoice['status']], 'due_date': [invoice['due_date']]})
+            return {'invoices': len(invoices)}
+        return run
+    return setup
+
+
+def scoring_batch(num_invoices):
+    def setup(workdir):
+        from modelStore import load_model
+
+        model = load_model()
+        data = scoring_frame(num_invoices)
+
+        def run():
+            probabilities = model.predict(data)
+            return {'invoices': len(data), 'flagged': int(model.labels(probabilities).sum())}
+        return run
+    return setup
+
+
+# --- Cypher statements of memgraphLoad.py and the dashboard /upload path ---
+
+def write_dataset(workdir, num_invoices, unlabeled=False):
+    import datasetcsvGenerator as generator
+
+    path = os.path.join(workdir, f'cypher_{num_invoices}.csv')
+    generator.generate_vectorized(max(100, num_invoices // 10), num_invoices, path, seed=42)
+    if not unlabeled:
+        return path
+
+    # Uploads come without a fraud column, like /generate_csv output
+    unlabeled_path = os.path.join(workdir, f'cypher_{num_invoices}_unlabeled.csv')
+    with open(path, newline='', encoding='utf-8') as source, open(unlabeled_path, 'w', newline='', encoding='utf-8') as target:
+        reader = csv.DictReader(source)
+        fields = [field for field in reader.fieldnames if field != 'fraud']
+        writer = csv.DictWriter(target, fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(reader)
+    return unlabeled_path
+
+
+def cypher_memgraph_load(num_invoices):
+    def setup(workdir):
+        from bulkLoader import DEFAULT_BATCH_SIZE
+        from memgraphLoad import load_and_train
+
+        path = write_dataset(workdir, num_invoices)
+
+        def run():
+            memgraph, recorder = stand_in()
+            load_and_train(memgraph, path, DEFAULT_BATCH_SIZE)
+            return recorder.summary()
+        return run
+    return setup
+
+
+# Same calls as dashboard.run_streamed_upload_job (ingest, then embed_and_predict)
+def cypher_dashboard_upload(num_invoices):
+    def setup(workdir):
+        from bulkLoader import DEFAULT_BATCH_SIZE, load_invoice_stream
+        from embeddings import DEFAULT_HOPS, set_incremental_embeddings
+        from fraudPrediction import DEFAULT_PREDICTION_BATCH_SIZE, predict_invoices
+
+        path = write_dataset(workdir, num_invoices, unlabeled=True)
+
+        def run():
+            memgraph, recorder = stand_in()
+            loaded_ids = array('q')
+            with open(path, 'rb') as stream:
+                load_invoice_stream(memgraph, stream, DEFAULT_BATCH_SIZE, invoice_ids=loaded_ids)
+            set_incremental_embeddings(memgraph, loaded_ids, DEFAULT_HOPS)
+            for _ in predict_invoices(memgraph, loaded_ids, DEFAULT_PREDICTION_BATCH_SIZE):
+                pass
+            return recorder.summary()
+        return run
+    return setup
+
+
+def register_all(sizes):
+    for size in sizes['generator_vectorized']:
+        register(f'generator.vectorized[{size}]', 'generator', generator_vectorized(size))
+    for size in sizes['generator_classic']:
+        register(f'generator.classic[{size}]', 'generator', generator_classic(size))
+    for size in sizes['training']:
+        register(f'training.xgboost[{size}]', 'training', training(size))
+    register(f"scoring.single[{sizes['scoring_single']}]", 'scoring', scoring_single(sizes['scoring_single']))
+    for size in sizes['scoring_batch']:
+        register(f'scoring.batch[{size}]', 'scoring', scoring_batch(size))
+    for size in sizes['cypher']:
+        register(f'cypher.memgraph_load[{size}]', 'cypher', cypher_memgraph_load(size))
+        register(f'cypher.dashboard_upload[{size}]', 'cypher', cypher_dashboard_upload(size))
+
+
+def measure(fn, repeat):
+    timings = []
+    extra = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        extra = fn()
+        timings.append(time.perf_counter() - start)
+
+    # Separate run for memory: tracemalloc slows allocation-heavy code down
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'repeat': repeat,
+        'min_seconds': round(min(timings), 6),
+        'median_seconds': round(statistics.median(timings), 6),
+        'mean_seconds': round(statistics.mean(timings), 6),
+        'peak_memory_mb': round(peak / (1024 * 1024), 3),
+        'extra': extra or {},
+    }
+
+
+def run_benchmark(name, component, setup, workdir, repeat):
+    try:
+        fn = setup(workdir)
+    except ImportError as e:
+        return {'component': component, 'skipped': f"missing dependency: {e.name or e}"}
+    except FileNotFoundError as e:
+        return {'component': component, 'skipped': f"missing file: {e.filename}"}
+    return dict(measure(fn, repeat), component=component)
+
+
+def package_versions():
+    versions = {}
+    for package in ('numpy', 'pandas', 'xgboost', 'scikit-learn', 'Faker', 'gqlalchemy'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Print median time and peak memory ratios against an earlier result file
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)['benchmarks']
+    print(f"\n{'benchmark':<40} {'time':>10} {'memory':>10}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or 'skipped' in result or 'skipped' in before:
+            continue
+        time_ratio = result['median_seconds'] / before['median_seconds'] if before['median_seconds'] else float('nan')
+        memory_ratio = result['peak_memory_mb'] / before['peak_memory_mb'] if before['peak_memory_mb'] else float('nan')
+        print(f"{name:<40} {time_ratio:>9.2f}x {memory_ratio:>9.2f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the project benchmark suite")
+    parser.add_argument('--only', nargs='+', choices=['generator', 'training', 'scoring', 'cypher'],
+                        help="Run only these components")
+    parser.add_argument('--filter', help="Run only benchmarks whose name contains this string")
+    parser.add_argument('--quick', action='store_true', help="Smallest sizes only")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency-ms', type=float, default=LATENCY_MS, help="Simulated Memgraph round-trip latency")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    LATENCY_MS = args.latency_ms
+    register_all(QUICK_SIZES if args.quick else SIZES)
+
+    results = OrderedDict()
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, (component, setup) in BENCHMARKS.items():
+            if args.only and component not in args.only:
+                continue
+            if args.filter and args.filter not in name:
+                continue
+            result = run_benchmark(name, component, setup, workdir, args.repeat)
+            results[name] = result
+            if 'skipped' in result:
+                print(f"{name:<40} skipped ({result['skipped']})")
+            else:
+                print(f"{name:<40} {result['median_seconds']:>10.4f}s {result['peak_memory_mb']:>10.1f} MB")
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'packages': package_versions(),
+        'latency_ms': LATENCY_MS,
+        'benchmarks': results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        compare(results, args.compare)